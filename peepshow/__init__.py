@@ -5,8 +5,11 @@ python_version = '.'.join(map(str, sys.version_info[:2]))
 if python_version not in supported_versions:
     raise RuntimeError('python version ' + python_version + ' is not supported')
 
-from peepshow.peep import peep, peep_
+from peepshow.peep import peep, peep_, peep_if, apeep, peep_batch, listen
+from peepshow.peep import capture_threads, inspect_captures
+from peepshow.peep import breakpoint, install_breakpoint
 from peepshow.show import show, show_
+from peepshow.show import enable, disable
 from peepshow.utils.python import catch
 from peepshow.utils.python import nth
 from peepshow.utils.traceback import enable_except_hook
@@ -0,0 +1,53 @@
+"""Command line interface of peepshow.
+
+python -m peepshow <SNAPSHOT>                        # examine snapshot of an exception
+python -m peepshow attach <PID|PATH> [--thread ID]   # examine running process
+"""
+import sys
+
+USAGE = """usage: python -m peepshow <SNAPSHOT>
+       python -m peepshow attach <PID|PATH> [--thread ID]"""
+
+
+def examine_snapshot(path):
+    from peepshow.peep import peep
+    from peepshow.utils import postmortem
+
+    try:
+        exc_stack = postmortem.load(path)
+    except Exception as ex:
+        print(f'peepshow: cannot load snapshot: {ex}', file=sys.stderr)
+        return 1
+
+    if len(exc_stack) == 1:
+        peep(exc_stack[0])
+    else:
+        peep(exc_stack)
+    return 0
+
+def attach(target, thread=None):
+    from peepshow.core import remote
+
+    try:
+        remote.attach(target, thread)
+    except OSError as ex:
+        print(f'peepshow: cannot attach to {target}: {ex}', file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if len(argv) == 1 and argv[0] != 'attach':
+        return examine_snapshot(argv[0])
+    if len(argv) == 2 and argv[0] == 'attach':
+        return attach(argv[1])
+    if len(argv) == 4 and argv[0] == 'attach' and argv[2] == '--thread':
+        return attach(argv[1], argv[3])
+
+    print(USAGE, file=sys.stderr)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
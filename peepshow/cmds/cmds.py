@@ -1,8 +1,10 @@
 import re
 import os
-import shutil
 import inspect
 import subprocess
+from collections import deque
+from collections.abc import Sequence
+from itertools import islice
 from pathlib import Path
 from miscutils.insp import isaccess
 import peepshow
@@ -18,7 +20,8 @@ from peepshow.utils.terminal import style, Style, Fore, Back
 from peepshow.utils import terminal
 from peepshow.pager import pager
 from peepshow.core.exceptions import CommandError
-from peepshow.utils.python import exc_to_str, crayon_expr, pformat
+from peepshow.utils.python import exc_to_str, crayon_expr
+from peepshow.utils import pretty
 from peepshow.utils.traceback import FrameSummary
 
 def table_width(table):
@@ -59,7 +62,7 @@ class Commands(CommandsBase):
             try:
                 try:
                     result = self.ctx.eval_(expr)
-                    print(repr(result))
+                    terminal.echo(repr(result))
                 except SyntaxError:
                     self.ctx.exec_(expr)
             except Exception as ex:
@@ -137,8 +140,10 @@ class Commands(CommandsBase):
         See also 'Dir' and 'DirPublic' commands.
         """
         target = self.ctx.target
-        content = self.ctx.mgr.propose_attr(dir(target))
-        self.ctx.explorer.fill(content, 'attr')
+        attr_names = dir(target)
+        content = self.ctx.mgr.propose_attr(attr_names)
+        derive = self.ctx.mgr.derive_attr(attr_names)
+        self.ctx.explorer.fill(content, 'attr', derive=derive)
 
     @command('Dir')
     def cmd_dir(self):
@@ -147,9 +152,10 @@ class Commands(CommandsBase):
         """
         target = self.ctx.target
         cond = lambda k: not isaccess(k).special
-        attr_names = filter(cond, dir(target))
+        attr_names = [*filter(cond, dir(target))]
         content = self.ctx.mgr.propose_attr(attr_names)
-        self.ctx.explorer.fill(content, 'attr')
+        derive = self.ctx.mgr.derive_attr(attr_names)
+        self.ctx.explorer.fill(content, 'attr', derive=derive)
 
     @command('DirPublic')
     def cmd_dir_public(self):
@@ -158,9 +164,10 @@ class Commands(CommandsBase):
         """
         target = self.ctx.target
         cond = lambda k: isaccess(k).public
-        attr_names = filter(cond, dir(target))
+        attr_names = [*filter(cond, dir(target))]
         content = self.ctx.mgr.propose_attr(attr_names)
-        self.ctx.explorer.fill(content, 'attr')
+        derive = self.ctx.mgr.derive_attr(attr_names)
+        self.ctx.explorer.fill(content, 'attr', derive=derive)
 
     @command('Vars')
     def cmd_vars(self):
@@ -173,8 +180,10 @@ class Commands(CommandsBase):
         except Exception as ex:
             raise CommandError(exc_to_str(ex))
 
-        content = self.ctx.mgr.propose_attr(v.keys(), v.values())
-        self.ctx.explorer.fill(content, 'attr')
+        keys, values = [*v.keys()], [*v.values()]
+        content = self.ctx.mgr.propose_attr(keys, values)
+        derive = self.ctx.mgr.derive_attr(keys, values)
+        self.ctx.explorer.fill(content, 'attr', derive=derive)
 
     @command('VarsPublic')
     def cmd_vars_public(self):
@@ -193,7 +202,8 @@ class Commands(CommandsBase):
         except ValueError:
             keys, values = (), ()
         content = self.ctx.mgr.propose_attr(keys, values)
-        self.ctx.explorer.fill(content, 'attr')
+        derive = self.ctx.mgr.derive_attr(keys, values)
+        self.ctx.explorer.fill(content, 'attr', derive=derive)
 
     @command('<INT>', int)
     def cmd_int(self, x):
@@ -242,9 +252,9 @@ class Commands(CommandsBase):
         """
         for entry, current in self.ctx.mgr.get_history(dialect.Readable()):
             if current:
-                print(style(Style.BRIGHT, entry))
+                terminal.echo(style(Style.BRIGHT, entry))
             else:
-                print(entry)
+                terminal.echo(entry)
 
     def qualifier_cmd_iterate(alias):
         regexp = re.compile('\*(\d*)$')
@@ -257,12 +267,14 @@ class Commands(CommandsBase):
         This can be used for listing values of iterable.
         Optional <OFFSET> can be used for skipping certain number of entires.
         """
-        target = self.ctx.target
         try:
-            content = self.ctx.mgr.propose_iter(offset) # TODO offset
+            content = self.ctx.mgr.propose_iter(offset)
         except TypeError:
             raise CommandError("Item is not iterable.")
-        self.ctx.explorer.fill(content, 'list', offset)
+        except IndexError as ex:
+            raise CommandError(ex) from ex
+        derive = self.ctx.mgr.derive_iter()
+        self.ctx.explorer.fill(content, 'list', offset, derive)
 
     def qualifier_cmd_items(alias):
         regexp = re.compile('\*\*(\d*)$')
@@ -278,14 +290,27 @@ class Commands(CommandsBase):
         target = self.ctx.target
         try:
             keys = target.keys()
+            if isinstance(keys, Sequence):
+                iterations = len(keys)
+                remaining = (keys[i] for i in range(offset, iterations))
+            else:
+                # keys are not copied, only those before offset are skipped
+                indexed = enumerate(keys)
+                skipped = deque(islice(indexed, offset), maxlen=1)
+                iterations = skipped[0][0] + 1 if skipped else 0
+                remaining = (key for _, key in indexed)
         except Exception as ex:
             raise CommandError(exc_to_str(ex))
 
+        if offset > iterations:
+            raise CommandError(f'Only {iterations} iterations possible.')
         try:
-            content = self.ctx.mgr.propose_subscr(keys)
+            content = self.ctx.mgr.propose_subscr(remaining)
         except:
             raise CommandError("Error while obtaining items to iterate.")
-        self.ctx.explorer.fill(content, 'dict', offset)
+        # keys which cannot be indexed are listed only if needed
+        derive = self.ctx.mgr.derive_subscr(keys if isinstance(keys, Sequence) else target.keys)
+        self.ctx.explorer.fill(content, 'dict', offset, derive)
 
     def qualifier_cmd_attrib(alias):
         regexp = re.compile('\.([A-Za-z_][A-Za-z0-9_]*)$')
@@ -338,13 +363,15 @@ class Commands(CommandsBase):
     def cmd_docstring(self):
         """Show docstring of the target."""
         try:
-            print(inspect.cleandoc(self.ctx.target.__doc__))
+            terminal.echo(inspect.cleandoc(self.ctx.target.__doc__))
         except Exception as ex:
             raise CommandError('Cannot read docstring.')
 
     @command('??')
     def cmd_source(self):
         """Show source code of the target."""
+        if not terminal.is_local():
+            raise CommandError('Source code can be shown only in a local terminal.')
         try:
             target = self.ctx.target
             if isinstance(target, FrameSummary):
@@ -423,6 +450,8 @@ class Commands(CommandsBase):
         """Show manual of peepshow.
         See also 'Help' command.
         """
+        if not terminal.is_local():
+            raise CommandError('Manual can be shown only in a local terminal.')
         man_path = Path(peepshow.__path__[0]) / 'peepshow.1'
         os.system(f'man -l {man_path}')
 
@@ -431,7 +460,7 @@ class Commands(CommandsBase):
         """Show basic information about the target object.
         See also 'Features' command.
         """
-        expr = f'{self.ctx.readable:^{shutil.get_terminal_size().columns}}'
+        expr = f'{self.ctx.readable:^{terminal.size().columns}}'
         header = style(Back.LIGHTBLUE_EX + Fore.WHITE + Style.BRIGHT, expr)
         terminal.clear()
         print_target_features(self.ctx.target, MAJOR_FEATURES, hlight=True, header=header)
@@ -451,6 +480,7 @@ class Commands(CommandsBase):
         Alternatively (under Linux) press: CTRL+L
         """
         terminal.clear()
+        terminal.flush()
 
     @command('Type')
     def cmd_type(self):
@@ -501,11 +531,13 @@ class Commands(CommandsBase):
         See also 'PrettyPrint' command.
         """
         expr = dialect.Evaluable().stringify(self.ctx.mgr.selected)
-        print(crayon_expr(expr))
+        terminal.echo(crayon_expr(expr))
 
     @command('PrettyPrint')
     def cmd_pretty_print(self):
         """Print target recursively.
+        Output is paged and computed only as far as it is displayed.
         See also 'eXpression' command.
         """
-        print(pformat(self.ctx.target))
+        width = terminal.size().columns
+        pager.page(pretty.rows(self.ctx.target, width))
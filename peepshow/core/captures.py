@@ -0,0 +1,87 @@
+"""Captures of peep() invoked by threads other than the main one.
+
+Instead of blocking at the prompt, such threads store a snapshot of their
+variables and the target in a bounded queue and continue. Captures are
+examined later, one by one, by inspect_captures().
+"""
+import time
+import queue
+import threading
+from peepshow.utils.system import capture_threads_by_env
+
+MAX_ITEMS = 1000 # number of items of the target which are copied
+
+enabled = capture_threads_by_env
+dropped = 0 # number of captures which didn't fit in the queue
+_captures = queue.Queue(maxsize=1000)
+_lock = threading.Lock()
+
+
+class Capture:
+    def __init__(self, frame, target, expr):
+        from peepshow.utils.python import snapshot
+
+        self.thread_name = threading.current_thread().name
+        self.time = time.time()
+        self.file_name = frame.f_code.co_filename
+        self.line_no = frame.f_lineno
+        self.callable_name = frame.f_code.co_name
+        self.expr = expr
+        # variables are copied shallowly, their values are shared with the thread
+        self.target = snapshot(target, max_items=MAX_ITEMS)
+        self.glo = frame.f_globals
+        self.loc = dict(frame.f_locals)
+
+    def __repr__(self):
+        expr = '' if self.expr is None else f' {self.expr}'
+        return f"[{self.thread_name}] {self.file_name}:{self.line_no} [{self.callable_name}]{expr}"
+
+    def __getitem__(self, name):
+        return self.loc[name]
+
+    def keys(self):
+        return self.loc.keys()
+
+    def values(self):
+        return self.loc.values()
+
+
+def should_capture():
+    return enabled and threading.current_thread() is not threading.main_thread()
+
+def capture(frame, target=None, expr=None):
+    """Store capture of the frame if there is enough room in the queue."""
+    global dropped
+    capture = Capture(frame, target, expr)
+    with _lock:
+        try:
+            _captures.put_nowait(capture)
+        except queue.Full:
+            dropped += 1
+
+def set_enabled(enabled_, max_captures=None):
+    """Pending captures are kept when size of the queue is changed, as many
+    as fit in the new queue."""
+    global enabled, _captures, dropped
+    enabled = enabled_
+    if max_captures is not None:
+        with _lock:
+            captures = queue.Queue(maxsize=max_captures)
+            while True:
+                try:
+                    captures.put_nowait(_captures.get_nowait())
+                except queue.Empty:
+                    break
+                except queue.Full:
+                    dropped += 1
+            _captures = captures
+
+def pop():
+    """Return the oldest capture or None if there are no captures."""
+    try:
+        return _captures.get_nowait()
+    except queue.Empty:
+        return None
+
+def pending():
+    return _captures.qsize()
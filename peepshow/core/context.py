@@ -1,7 +1,7 @@
 import peepshow.core.dialect as dialect
 from peepshow.utils import terminal
 from peepshow.core.explorer import Explorer
-from peepshow.utils.python import catch, nth
+from peepshow.utils.python import catch, nth, compile_expr
 from peepshow.core.trans import TransformationMgr
 
 class Context:
@@ -25,7 +25,7 @@ class Context:
         return dialect.Readable().stringify(self.mgr.selected)
 
     def eval_(self, expr):
-        return eval(expr, {}, self.env.current)
+        return eval(compile_expr(expr), {}, self.env.current)
 
     def exec_(self, expr):
-        exec(expr, {}, self.env.current)
+        exec(compile_expr(expr, 'exec'), {}, self.env.current)
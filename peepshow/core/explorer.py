@@ -94,14 +94,14 @@ class Explorer:
         self.cache = PagedCache([])
         self.cached_target = None
 
-    def fill(self, content, style, offset=0):
+    def fill(self, content, style, offset=0, derive=None):
         """style: 'attr', 'list', 'dict'
+        offset: index of the first entry of the content
+        derive: function which makes entry of given index again, if it is
+        dropped from the cache
         """
         str_func_styled = partial(str_func, style)
-        try:
-            self.cache = paged_cache.page(content, str_func_styled, offset)
-        except paged_cache.TooManyInitialIterations as ex:
-            raise CommandError(ex) from ex
+        self.cache = paged_cache.page(content, str_func_styled, offset, derive)
         self.cached_target = self.ctx.target
 
     def recall(self):
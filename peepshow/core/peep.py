@@ -23,7 +23,7 @@ def read_command(ctx):
         action_color = style(Fore.CYAN, action, for_readline=True)
         action_color += ' ' if action else ''
 
-        cmd_raw = input(type_name_color + action_color + '> ').strip()
+        cmd_raw = terminal.read(type_name_color + action_color + '> ').strip()
         terminal.prefill_input()
         if not cmd_raw:
             # execute suggested action:
@@ -97,6 +97,7 @@ def execute_command(ctx, cmd_hdlr, cmd_args):
 
 def clean_up():
     terminal.clear()
+    terminal.flush()
 
 
 def stop(try_exit):
@@ -109,7 +110,7 @@ def stop(try_exit):
             return False
 
     cancel_stop = False
-    if try_exit:
+    if try_exit and terminal.is_local():
         if sys.gettrace():
             print_error('Underlying debugger cannot be terminated.')
             # in fact it can be, but in case of pdb/ipdb it results in an ugly exception
@@ -0,0 +1,239 @@
+"""Peep sessions opened from another process over a Unix domain socket.
+
+Client and server exchange JSON objects, one per line. Server sends requests
+to the client: {"write": TEXT}, {"read": PROMPT}, {"getch": null},
+{"clear": null}, {"prefill": TEXT}. Client responds to "read" with
+{"line": TEXT}, {"eof": null} or {"interrupt": null} and to "getch" with
+{"key": KEY}. Initially client sends {"thread": ID, "size": [COLS, ROWS]}.
+"""
+import os
+import sys
+import json
+import stat
+import socket
+import tempfile
+import threading
+from peepshow.utils import terminal
+
+_server = None
+_lock = threading.Lock()
+
+def default_dir():
+    """Return directory of the sockets, private to the current user."""
+    return os.path.join(tempfile.gettempdir(), f'peepshow-{os.getuid()}')
+
+def default_path(pid=None):
+    pid = os.getpid() if pid is None else pid
+    return os.path.join(default_dir(), f'{pid}.sock')
+
+def _make_private_dir(path):
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f'{path} is not a private directory of the current user.')
+
+
+class Connection:
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile('rw', encoding='utf-8', newline='\n')
+
+    def send(self, message, flush=True):
+        self.file.write(json.dumps(message) + '\n')
+        if flush:
+            self.file.flush()
+
+    def recv(self, *keys):
+        """Return the message. If keys are given, message must contain
+        one of them, otherwise ValueError is raised."""
+        line = self.file.readline()
+        if not line:
+            raise EOFError
+        message = json.loads(line)
+        if not isinstance(message, dict) or keys and not message.keys() & set(keys):
+            raise ValueError(f'Unexpected message: {line.strip()}')
+        return message
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class SocketConsole(terminal.Console):
+    """Console of a client connected over the socket."""
+
+    local = False
+
+    def __init__(self, conn, size):
+        self.conn = conn
+        self._size = os.terminal_size(size)
+
+    def init(self, suggestions):
+        self.clear()
+
+    def read(self, prompt):
+        self.conn.send({'read': prompt})
+        reply = self.conn.recv('line', 'eof', 'interrupt')
+        if 'interrupt' in reply:
+            raise KeyboardInterrupt
+        if 'eof' in reply:
+            raise EOFError
+        return _checked(reply['line'], str)
+
+    def write(self, text):
+        # sent together with the next request
+        self.conn.send({'write': text}, flush=False)
+
+    def flush(self):
+        self.conn.file.flush()
+
+    def getch(self):
+        self.conn.send({'getch': None})
+        return _checked(self.conn.recv('key')['key'], str)
+
+    def clear(self):
+        self.conn.send({'clear': None}, flush=False)
+
+    def size(self):
+        return self._size
+
+    def prefill(self, text=None):
+        self.conn.send({'prefill': text}, flush=False)
+
+
+def _checked(value, type_):
+    if not isinstance(value, type_):
+        raise ValueError(f'Unexpected value: {value!r}')
+    return value
+
+def _initial_target(thread):
+    """Return target and environment of the session: either globals of
+    __main__ or stack of given thread, from the outermost frame."""
+    import traceback
+    from peepshow.core.trans import GloLoc, Given
+    from peepshow.core.env import Env
+    from peepshow.utils.traceback import FrameSummary
+
+    if thread is None:
+        env = Env(vars(sys.modules['__main__']), {})
+        return GloLoc(env.initial), env
+
+    threads = threading.enumerate()
+    idents = {str(t.ident): t.ident for t in threads}
+    idents.update({t.name: t.ident for t in threads})
+    try:
+        frame = sys._current_frames()[idents[str(thread)]]
+    except KeyError:
+        raise LookupError(f'No such thread: {thread}.') from None
+
+    stack = [FrameSummary(f) for f, _ in traceback.walk_stack(frame)][::-1]
+    env = Env(frame.f_globals, {'stack': stack})
+    return Given(stack, 'stack'), env
+
+def _serve(sock):
+    from peepshow.core import peep as core
+
+    conn = Connection(sock)
+    try:
+        hello = conn.recv()
+        size = _checked(hello.get('size', (80, 24)), (list, tuple))
+        if len(size) != 2 or not all(isinstance(x, int) and x > 0 for x in size):
+            raise ValueError(f'Unexpected size: {size!r}')
+        thread = _checked(hello.get('thread'), (str, int, type(None)))
+        console = SocketConsole(conn, size)
+        with terminal.use_console(console):
+            try:
+                target, env = _initial_target(thread)
+            except LookupError as ex:
+                terminal.print_error(str(ex))
+            else:
+                core.peep(target, env)
+            console.flush()
+    except (OSError, EOFError, ValueError):
+        pass # client is gone or misbehaves
+    finally:
+        conn.close()
+
+def _accept(server):
+    while True:
+        sock, _ = server.accept()
+        threading.Thread(target=_serve, args=(sock,), name='peepshow-session', daemon=True).start()
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+def listen(path=None):
+    """Start listening on Unix domain socket. Return its path."""
+    global _server
+
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError('Unix domain sockets are not supported on this platform.')
+
+    with _lock:
+        if _server is not None:
+            return _server.getsockname()
+
+        import atexit
+        if path is None:
+            _make_private_dir(default_dir())
+            path = default_path()
+        _remove(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # only the owner of the process can attach, socket is never accessible
+        # to others, not even between bind() and chmod()
+        umask = os.umask(0o177)
+        try:
+            server.bind(path)
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o600)
+        server.listen()
+        atexit.register(_remove, path)
+        threading.Thread(target=_accept, args=(server,), name='peepshow-listener', daemon=True).start()
+        _server = server
+        return path
+
+
+def attach(target, thread=None):
+    """Open peep session in a process which is listening. `target` is either
+    PID of the process or path of the socket."""
+    path = default_path(target) if str(target).isdigit() else target
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    conn = Connection(sock)
+    console = terminal.Console()
+    console.init({})
+    try:
+        conn.send({'thread': thread, 'size': tuple(console.size())})
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            (key, value), = request.items()
+            if key == 'write':
+                console.write(value)
+            elif key == 'read':
+                try:
+                    reply = {'line': console.read(value)}
+                except EOFError:
+                    reply = {'eof': None}
+                except KeyboardInterrupt:
+                    reply = {'interrupt': None}
+                conn.send(reply)
+            elif key == 'getch':
+                console.flush()
+                conn.send({'key': console.getch()})
+            elif key == 'clear':
+                console.clear()
+            elif key == 'prefill':
+                console.prefill(value)
+    finally:
+        console.flush()
+        conn.close()
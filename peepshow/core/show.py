@@ -1,6 +1,59 @@
-from peepshow.utils.python import prettify_expr, pformat
+from peepshow.utils.python import fingerprint
+from peepshow.core.sinks import Record, TextSink
 
-def show(names, values):
-    """Show names of variables together with corresponding values."""
+class Options:
+    """Options of show/show_. Those which are not given are taken from `base`."""
+
+    def __init__(self, base=None, **options):
+        for name, value in options.items():
+            if base is not None and not hasattr(base, name):
+                raise TypeError(f"Unknown option '{name}'.")
+            setattr(self, name, value)
+        self._base = base
+
+    def __getattr__(self, name):
+        base = self.__dict__.get('_base')
+        if base is None:
+            raise AttributeError(name)
+        return getattr(base, name)
+
+options = Options(
+    only_changes=False, # show values only if they changed since last call from the same place
+    every=None,         # show only every N-th call from the same place
+    per_second=None,    # show at most N calls per second from the same place
+    first=None,         # show only first N calls from the same place
+    sink=TextSink(),    # destination of the output or list of destinations
+)
+
+def show(names, values, site, options):
+    """Show names of variables together with corresponding values.
+    If options.only_changes is set, values that didn't change since the last
+    call from this site are skipped and only counted.
+    """
+    if options.only_changes:
+        names, values, notes = _filter_changes(names, values, site)
+        if not names:
+            return
+    else:
+        notes = [''] * len(names)
+
+    record = Record(site, names, values, notes)
+    if isinstance(options.sink, (list, tuple)):
+        for sink in options.sink:
+            sink.emit(record)
+    else:
+        options.sink.emit(record)
+
+def _filter_changes(names, values, site):
+    changed = [], [], []
     for name, value in zip(names, values):
-        print(f'{prettify_expr(name)} = {pformat(value)}')
+        fp = fingerprint(value)
+        if site.fingerprints.get(name) == fp:
+            site.suppressed[name] = site.suppressed.get(name, 0) + 1
+            continue
+        site.fingerprints[name] = fp
+        repeats = site.suppressed.pop(name, 0)
+        note = f'  # previous value repeated {repeats} time(s)' if repeats else ''
+        for column, item in zip(changed, (name, value, note)):
+            column.append(item)
+    return changed
@@ -0,0 +1,268 @@
+"""Destinations where show/show_ put their output."""
+import os
+import sys
+import math
+import time
+import queue
+import atexit
+import threading
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from peepshow.utils.python import prettify_expr, pformat, snapshot
+
+class Record(SimpleNamespace):
+    """Everything that is known about single call of show/show_."""
+
+    def __init__(self, site, names, values, notes):
+        thread = threading.current_thread()
+        super().__init__(site=site, names=names, values=values, notes=notes,
+                         time=time.time(), thread=thread.name)
+
+
+class Sink(ABC):
+    """Records are formatted by format() and the resulting text is passed to
+    write()."""
+
+    @abstractmethod
+    def format(self, record):
+        pass
+
+    @abstractmethod
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def emit(self, record):
+        self.write(self.format(record))
+
+
+class TextSink(Sink):
+    """Print `name = value` lines to the stream (sys.stdout by default)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def format(self, record):
+        lines = (f'{prettify_expr(name)} = {pformat(value)}{note}\n'
+                 for name, value, note in zip(record.names, record.values, record.notes))
+        return ''.join(lines)
+
+    def write(self, text):
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(text)
+
+    def flush(self):
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.flush()
+
+
+class BackgroundSink(Sink):
+    """Pass records to another sink (TextSink by default) in a background thread.
+
+    The caller only takes a snapshot of the values: copy_depth=0 keeps
+    references, 1 makes shallow copies, higher values copy nested containers
+    down to given depth. Only max_items items of each container are copied
+    (None copies all of them). Records which don't fit in the queue are
+    dropped and counted.
+    """
+
+    def __init__(self, sink=None, *, copy_depth=1, max_items=1000, max_queue=10000):
+        self.sink = TextSink() if sink is None else sink
+        self.copy_depth = copy_depth
+        self.max_items = max_items
+        self.dropped = 0
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        record.values = [snapshot(value, self.copy_depth, self.max_items) for value in record.values]
+        self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def format(self, record):
+        return self.sink.format(record)
+
+    def write(self, text):
+        """Write text to the underlying sink directly."""
+        self.sink.write(text)
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._work, name='peepshow-sink', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def _work(self):
+        while True:
+            records = [self._queue.get()]
+            try:
+                while True:
+                    records.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = None in records
+            records = [record for record in records if record is not None]
+
+            try:
+                texts = []
+                for record in records:
+                    try:
+                        texts.append(self.format(record))
+                    except Exception as ex:
+                        texts.append(f'<peepshow: cannot format output: {ex!r}>\n')
+                if texts:
+                    self.write(''.join(texts))
+                    self.sink.flush()
+            except Exception as ex:
+                # thread has to survive, otherwise flush() would never return
+                print(f'peepshow: cannot write output: {ex!r}', file=sys.stderr)
+            finally:
+                for _ in range(len(records) + stop):
+                    self._queue.task_done()
+
+            if stop:
+                break
+
+    def flush(self):
+        """Wait until all the records emitted so far are written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout=5):
+        """Write pending records and stop the background thread."""
+        if self._thread is not None:
+            self._queue.put(None, timeout=timeout)
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def jsonable(obj, *, max_depth=4, max_items=100, max_string=1000, max_nodes=1000):
+    """Convert object to something that can be encoded by json module.
+    Strings are truncated to max_string characters, containers to max_items
+    items and max_depth levels, traversal stops after visiting max_nodes
+    objects. Elided parts are marked by '...'. Objects other than built-in
+    types are replaced by their repr(). Keys of dictionaries are converted to
+    strings; if some of them become equal then, the dictionary is converted to
+    a list of [key, value] pairs instead.
+    """
+    remaining = max_nodes
+
+    def string(text):
+        return text if len(text) <= max_string else text[:max_string] + '...'
+
+    def convert(obj, depth):
+        nonlocal remaining
+        remaining -= 1
+
+        if obj is None or isinstance(obj, (bool, int)):
+            return obj
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else repr(obj)
+        if isinstance(obj, str):
+            return string(obj)
+        if isinstance(obj, (list, tuple, set, frozenset, dict)):
+            if depth >= max_depth or remaining <= 0:
+                return '...'
+            depth += 1
+            if isinstance(obj, dict):
+                items = []
+                for i, (key, value) in enumerate(obj.items()):
+                    if i >= max_items or remaining <= 0:
+                        items.append(('...', len(obj) - i))
+                        break
+                    key = key if isinstance(key, str) else repr(key)
+                    items.append((string(key), convert(value, depth)))
+                ret = dict(items)
+                if len(ret) < len(items):
+                    ret = [[*item] for item in items]
+            else:
+                ret = []
+                for i, item in enumerate(obj):
+                    if i >= max_items or remaining <= 0:
+                        ret.append('...')
+                        break
+                    ret.append(convert(item, depth))
+            return ret
+        try:
+            return string(repr(obj))
+        except Exception:
+            return f'<{type(obj).__name__}>'
+
+    return convert(obj, 0)
+
+
+class JsonSink(Sink):
+    """Write one JSON object per line for each call of show/show_.
+
+    target can be a path, a file descriptor or a file object. Output is
+    buffered until buffer_size characters is collected or flush() is called.
+    close() is called at exit; it closes the file only if it was opened by
+    the sink.
+    Remaining keyword arguments limit size of the values, see jsonable().
+    """
+
+    def __init__(self, target, *, buffer_size=65536, **limits):
+        if isinstance(target, int):
+            self.file = open(target, 'a', closefd=False)
+        elif isinstance(target, (str, os.PathLike)):
+            self.file = open(target, 'a')
+        else:
+            self.file = target
+        self._own_file = self.file is not target
+        import json
+        self._encoder = json.JSONEncoder(separators=(',', ':'), check_circular=False)
+        self.buffer_size = buffer_size
+        self.limits = limits
+        self._buffer = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def format(self, record):
+        site = record.site
+        obj = {
+            'time': record.time,
+            'thread': record.thread,
+            'file': site.file_name,
+            'line': site.line_no,
+            'function': site.callable_name,
+            'names': [*record.names],
+            'values': [jsonable(value, **self.limits) for value in record.values],
+        }
+        return self._encoder.encode(obj) + '\n'
+
+    def write(self, text):
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered += len(text)
+            if self._buffered >= self.buffer_size:
+                self._write_buffer()
+
+    def flush(self):
+        with self._lock:
+            self._write_buffer()
+            self.file.flush()
+
+    def close(self):
+        """Write buffered output and close the file opened by the sink."""
+        atexit.unregister(self.close)
+        if getattr(self.file, 'closed', False):
+            return
+        self.flush()
+        if self._own_file:
+            self.file.close()
+
+    def _write_buffer(self):
+        if self._buffer:
+            self.file.write(''.join(self._buffer))
+            self._buffer[:] = []
+            self._buffered = 0
@@ -0,0 +1,67 @@
+"""Book-keeping of the places in the user code where peepshow is invoked."""
+import time
+
+class CallSite:
+    def __init__(self, frame):
+        code = frame.f_code
+        self.file_name = code.co_filename
+        self.line_no = frame.f_lineno
+        self.callable_name = code.co_name
+        self.fingerprints = {} # name -> fingerprint of the value shown recently
+        self.suppressed = {}   # name -> number of repeats not shown since then
+        self.calls = 0         # number of calls from this site
+        self.skipped = 0       # number of calls rejected by admit()
+        self.hits = 0          # number of calls with condition satisfied
+        self._second_start = 0.0
+        self._second_calls = 0
+
+    def admit(self, every=None, per_second=None, first=None):
+        """Register a call and decide if it should be handled.
+        every:      accept every N-th call
+        per_second: accept at most N calls per second
+        first:      accept only first N calls
+        """
+        self.calls += 1
+        accept = (first is None or self.calls <= first) and \
+                 (every is None or (self.calls - 1) % every == 0)
+
+        if accept and per_second is not None:
+            now = time.monotonic()
+            if now - self._second_start >= 1:
+                self._second_start = now
+                self._second_calls = 0
+            accept = self._second_calls < per_second
+            self._second_calls += accept
+
+        self.skipped += not accept
+        return accept
+
+    def hit(self, nth=None, after=None):
+        """Register a call with condition satisfied and decide if it should be
+        handled.
+        nth:   accept only N-th hit
+        after: accept only hits following first N ones
+        """
+        self.hits += 1
+        return (nth is None or self.hits == nth) and \
+               (after is None or self.hits > after)
+
+    def __repr__(self):
+        return f"{self.file_name}:{self.line_no} [{self.callable_name}]"
+
+_sites = {}
+
+def get_site(frame):
+    """Return CallSite corresponding to the call being executed in given frame."""
+    # code objects of identical functions compare equal, even across files
+    code = frame.f_code
+    key = (code.co_filename, code.co_firstlineno, code.co_name, frame.f_lasti)
+    try:
+        return _sites[key]
+    except KeyError:
+        site = _sites[key] = CallSite(frame)
+        return site
+
+def reset():
+    """Forget all the call sites together with their state."""
+    _sites.clear()
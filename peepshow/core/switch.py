@@ -0,0 +1,50 @@
+from peepshow.utils.system import disabled_by_env
+
+_enabled = True
+_rules = {}     # module name -> enabled
+_resolved = {}  # module name -> enabled, takes parent modules into account
+
+def noop(*args, **kwargs):
+    """Replacement for show/show_/peep/peep_ when peepshow is disabled by
+    PEEPSHOW_DISABLED environment variable."""
+
+async def anoop(*args, **kwargs):
+    """Replacement for apeep, see noop."""
+
+
+def set_enabled(enabled, modules=()):
+    """Enable/disable peepshow globally or only in given modules.
+    Rules for modules apply also to their submodules, similarly to loggers.
+    Global setting drops all the rules for modules.
+    """
+    global _enabled
+    if modules:
+        for module in modules:
+            _rules[module] = enabled
+    else:
+        _enabled = enabled
+        _rules.clear()
+    _resolved.clear()
+
+
+def is_enabled(frame):
+    """Check if peepshow is enabled in the module where frame is executed."""
+    if not _rules:
+        return _enabled
+
+    module = frame.f_globals.get('__name__', '')
+    try:
+        return _resolved[module]
+    except KeyError:
+        pass
+
+    enabled = _enabled
+    name = module
+    while name:
+        if name in _rules:
+            enabled = _rules[name]
+            break
+        name = name.rpartition('.')[0]
+
+    _resolved[module] = enabled
+    return enabled
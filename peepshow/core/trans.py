@@ -1,3 +1,6 @@
+from collections import deque
+from collections.abc import Sequence
+from itertools import islice
 from peepshow.core.exceptions import CommandError
 from peepshow.utils.python import CheckInvocation, InvocationError
 from peepshow.utils.python import prettify_expr, exc_to_str
@@ -173,40 +176,90 @@ class TransformationMgr:
         transformation.link(self.selected)
         self.selected = transformation
 
-    def propose_iter(self, offset):
-        for index, item in enumerate(self.selected.result):
-            transformation = Iter(index)
-            transformation.link(self.selected, forward=False)
-            transformation.assign(item)
-            yield None, transformation
+    def make(self, transformation, *value, prev=None):
+        """Link transformation to `prev` (selected one by default) without
+        accepting it. Evaluate it, unless its value is given."""
+        prev = self.selected if prev is None else prev
+        transformation.link(prev, forward=False)
+        if value:
+            transformation.assign(*value)
+        else:
+            transformation.execute(prev, self._ctx, safe=True)
+        return transformation
+
+    def propose_iter(self, offset=0):
+        """Return entries of the selected item starting from offset-th one.
+        Sequences are indexed directly, other iterables are skipped by islice.
+        Raise IndexError if there are fewer items than offset.
+        """
+        target = self.selected.result
+        if isinstance(target, Sequence):
+            if offset > len(target):
+                raise IndexError(f'Only {len(target)} iterations possible.')
+            items = ((index, target[index]) for index in range(offset, len(target)))
+        else:
+            items = enumerate(target)
+            skipped = deque(islice(items, offset), maxlen=1)
+            iterations = skipped[0][0] + 1 if skipped else 0
+            if iterations < offset:
+                raise IndexError(f'Only {iterations} iterations possible.')
+        return self._propose_iter(items)
+
+    def _propose_iter(self, items):
+        for index, item in items:
+            yield None, self.make(Iter(index), item)
 
     def propose_attr(self, attr_names, values=None):
         if values is None:
             for attr_name in attr_names:
-                transformation = Attrib(attr_name)
-                transformation.link(self.selected, forward=False)
-                transformation.execute(self.selected, self._ctx, safe=True)
-                yield attr_name, transformation
+                yield attr_name, self.make(Attrib(attr_name))
         else:
             for attr_name, value in zip(attr_names, values):
-                transformation = Attrib(attr_name)
-                transformation.link(self.selected, forward=False)
-                transformation.assign(value)
-                yield attr_name, transformation
+                yield attr_name, self.make(Attrib(attr_name), value)
 
     def propose_subscr(self, indices, values=None):
+        """Both indices and values can be lazy, e.g. islice objects."""
         if values is None:
             for index in indices:
-                transformation = Subscr(index)
-                transformation.link(self.selected, forward=False)
-                transformation.execute(self.selected, self._ctx, safe=True)
-                yield repr(index), transformation
+                yield repr(index), self.make(Subscr(index))
         else:
             for index, value in zip(indices, values):
-                transformation = Subscr(index)
-                transformation.link(self.selected, forward=False)
-                transformation.assign(value)
-                yield repr(index), transformation
+                yield repr(index), self.make(Subscr(index), value)
+
+    # derive_* return functions which make index-th entry proposed by
+    # corresponding propose_* again, so that it doesn't need to be cached
+
+    def derive_iter(self):
+        """Return None if the target doesn't support random access."""
+        prev = self.selected
+        if not isinstance(prev.result, Sequence):
+            return None
+        def derive(index):
+            return None, self.make(Iter(index), prev.result[index], prev=prev)
+        return derive
+
+    def derive_attr(self, attr_names, values=None):
+        prev = self.selected
+        def derive(index):
+            attr_name = attr_names[index]
+            value = () if values is None else (values[index],)
+            return attr_name, self.make(Attrib(attr_name), *value, prev=prev)
+        return derive
+
+    def derive_subscr(self, indices, values=None):
+        """Indices can be also given as a function returning them, e.g. keys
+        method of a mapping. Then they are listed by the first call of derive.
+        """
+        prev = self.selected
+        listed = None
+        def derive(index):
+            nonlocal listed
+            if listed is None:
+                listed = [*indices()] if callable(indices) else indices
+            key = listed[index]
+            value = () if values is None else (values[index],)
+            return repr(key), self.make(Subscr(key), *value, prev=prev)
+        return derive
 
     def select_next(self):
         self.selected = self.selected.get_next()
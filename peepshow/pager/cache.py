@@ -1,60 +1,118 @@
-from peepshow.pager.pager import Pager
-
-class TooManyInitialIterations(StopIteration): pass
+import threading
+from collections import OrderedDict
+from peepshow.pager.pager import Pager, MAX_ROWS
+from peepshow.utils import terminal
+from peepshow.utils.system import cache_pages
 
 class PagedCache:
+    """Entries listed by the pager, available for selection by their indices.
+
+    Entries are kept in pages of the screen size. Only `max_pages` recently
+    listed or selected pages are kept. Entries of dropped pages are made again
+    by `derive` function, if the source of the entries allows for that.
+    """
 
-    def __init__(self, content, str_func=str):
+    def __init__(self, content, str_func=str, derive=None, max_pages=None, page_size=None, offset=0):
         self.iterator = content.__iter__()
-        self.index = 0
-        self.offset = 0
-        self.cache = []
+        self.index = offset  # index of the next entry
+        self.offset = offset # index of the first listed entry
+        self.pages = OrderedDict() # page number -> {index: entry}
+        self.max_pages = max(1, cache_pages if max_pages is None else max_pages)
+        self.page_size = max(1, terminal.size().lines - 1 if page_size is None else page_size)
         self.str_func = str_func
+        self.derive = derive
+        self._pending = None # entry pulled from the content but not formatted yet
+        self._detached = False
+        # entries can be still pulled by a prefetching thread of the pager
+        self._lock = threading.Lock()
 
-    def iterate(self, times):
-        for i in range(times):
-            next(self.iterator)
-            self.offset += 1
-            self.index += 1
+    def _page(self, index):
+        page_no = index // self.page_size
+        try:
+            self.pages.move_to_end(page_no)
+        except KeyError:
+            self.pages[page_no] = {}
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return self.pages[page_no]
+
+    def _format(self, index, obj):
+        return f'[{index:>5}] {self.str_func(obj)}'
 
     def __iter__(self):
-        while True:
-            try:
-                obj = next(self.iterator)
-            except StopIteration:
-                break
-            line = self.str_func(obj)
-            self.cache.append(obj)
-            yield f'[{self.index:>5}] {line}'
+        return self
+
+    def __next__(self):
+        if self._detached:
+            raise StopIteration
+        # if formatting fails, e.g. in another thread, the same entry is
+        # formatted again by the next call
+        if self._pending is None:
+            self._pending = next(self.iterator),
+        obj, = self._pending
+        line = self._format(self.index, obj)
+        self._pending = None
+        with self._lock:
+            if self._detached:
+                # pager is gone, the entry has never been displayed
+                raise StopIteration
+            self._page(self.index)[self.index] = obj
             self.index += 1
+        return line
 
-    def clear_cache(self):
-        self.offset += len(self.cache)
-        self.cache[:] = []
+    def detach(self):
+        """Stop accepting entries, e.g. those pulled by a prefetching thread
+        which outlived the pager."""
+        with self._lock:
+            self._detached = True
 
     def __getitem__(self, index):
-        cache_index =  index - self.offset
-        if not cache_index >= 0 or not cache_index < len(self.cache):
-            raise IndexError("You can use only indices visible on the screen.")
+        with self._lock:
+            if not self.offset <= index < self.index:
+                raise IndexError("You can use only indices of listed entries.")
+            if self._cached(index):
+                return self._page(index)[index]
+        if self.derive is None:
+            raise IndexError(f"Entry {index} is no longer cached and cannot be "
+                             "obtained again. List the entries again to select it.")
+        obj = self.derive(index)
+        with self._lock:
+            self._page(index)[index] = obj
+        return obj
+
+    def _cached(self, index):
+        return index in self.pages.get(index // self.page_size, ())
 
-        return self.cache[cache_index]
+    def _recall(self, first, end):
+        # rows are rendered again from the entries, recalling doesn't
+        # change which pages are kept
+        for index in range(first, end):
+            with self._lock:
+                page = self.pages.get(index // self.page_size, {})
+                cached = index in page
+                obj = page.get(index)
+            if not cached:
+                obj = self.derive(index)
+            yield self._format(index, obj)
 
     def recall_cache(self):
-        def content_gen():
-            for index, entry in enumerate(self.cache):
-                key, obj = entry
-                line = self.str_func(entry)
-                index_ = index + self.offset
-                yield f'[{index_:>5}] {line}'
-        p = Pager(numeric=True)
-        p.page(content_gen())
-
-def page(content, str_func=str, offset=0):
-    cache = PagedCache(content, str_func)
+        with self._lock:
+            end = self.index
+            first = max(self.offset, end - MAX_ROWS)
+            if self.derive is None:
+                # only the latest entries which are still cached can be listed
+                first = end
+                while first > self.offset and self._cached(first - 1):
+                    first -= 1
+        p = Pager(numeric=True, index_base=first)
+        p.page(self._recall(first, end))
+
+def page(content, str_func=str, offset=0, derive=None):
+    """Content is expected to start from offset-th entry."""
+    cache = PagedCache(content, str_func, derive, offset=offset)
+    pager = Pager(numeric=True, index_base=cache.offset)
     try:
-        cache.iterate(offset)
-    except StopIteration as ex:
-        raise TooManyInitialIterations(f'Only {cache.index} iterations possible.') from ex
-    pager = Pager( (PagedCache.clear_cache, cache), numeric=True )
-    pager.page(cache)
+        pager.page(cache)
+    finally:
+        cache.detach()
     return cache
@@ -1,113 +1,325 @@
-from getch import getch # py-getch package
-import sys
 import colorama
 import re
+import threading
+from collections import deque
+from itertools import islice, count
 from peepshow.utils import terminal
-import shutil
+from peepshow.utils.system import prefetch_enabled
 
 class Line:
     ansi_escape = re.compile(r'\x1b[^m]*m')
 
-    def __init__(self, text):
+    def __init__(self, text, width=None):
         self.text = text
+        self._width = width # number of visible characters, computed once
 
     def no_colors(self):
         return self.ansi_escape.sub('', self.text)
 
     def __len__(self):
-        return len(self.no_colors())
+        if self._width is None:
+            if '\x1b' in self.text:
+                self._width = len(self.no_colors())
+            else:
+                self._width = len(self.text)
+        return self._width
 
     def __str__(self):
         return self.text
 
-    def trim(self, length):
-        in_buf = self.text
-        out_buf = ''
-        out_buf_len = 0
-        while in_buf and out_buf_len < length:
-
-            m = self.ansi_escape.match(in_buf)
+    def _scan(self, length):
+        """Return pieces of the text covering up to `length` visible
+        characters, together with their width. Text beyond is not scanned."""
+        text = self.text
+        pieces = []
+        pos = 0
+        remaining = length
+        while remaining > 0 and pos < len(text):
+            esc = text.find('\x1b', pos, pos + remaining)
+            if esc < 0:
+                chunk = text[pos:pos + remaining]
+                pieces.append(chunk)
+                remaining -= len(chunk)
+                break
+            pieces.append(text[pos:esc])
+            remaining -= esc - pos
+            m = self.ansi_escape.match(text, esc)
             if m:
-                out_buf += m.group()
-                in_buf = in_buf[m.end():]
-                continue
+                pieces.append(m.group())
+                pos = m.end()
             else:
-                out_buf += in_buf[0]
-                out_buf_len += 1
-                in_buf = in_buf[1:]
+                # stray ESC is a visible character
+                pieces.append('\x1b')
+                remaining -= 1
+                pos = esc + 1
+        return pieces, length - remaining
 
-        return Line(out_buf + colorama.Style.RESET_ALL)
+    def fits(self, length):
+        """Check if visible width doesn't exceed `length`."""
+        if self._width is not None or len(self.text) <= length:
+            return len(self) <= length
+        _, width = self._scan(length + 1)
+        return width <= length
+
+    def trim(self, length):
+        pieces, width = self._scan(length)
+        pieces.append(colorama.Style.RESET_ALL)
+        return Line(''.join(pieces), width)
 
     def __add__(self, other):
-        return Line(self.text + str(other))
+        other = other if isinstance(other, Line) else Line(str(other))
+        return Line(self.text + other.text, len(self) + len(other))
+
+MAX_ROWS = 10000 # rendered rows kept for scrolling back
+
+ESC = '\x1b'
+CTRL_C = '\x03'
+STOP_KEYS = (ESC, CTRL_C, 'q', 'Q')
+
 
 class Pager:
+    """Viewport over rows of the content. Rows are pulled lazily, only when
+    screen or search reaches them, and the recent ones are kept for scrolling
+    back. Rows are trimmed to the screen only when displayed."""
 
-    def __init__(self, start_page_callback=((lambda: None),), numeric=False):
-        self.page_width, self.page_height = shutil.get_terminal_size()
-        self.start_page_callback = start_page_callback
+    def __init__(self, numeric=False, index_base=0, max_rows=MAX_ROWS):
+        self.page_width, self.page_height = terminal.size()
+        self.interactive = terminal.is_interactive()
         self.numeric = numeric
+        self.index_base = index_base # index displayed by the first row, used for jumps
+        footer_height = 1 # reserve one line for the prompt
+        self.usable_height = max(self.page_height - footer_height, 1)
+        # the screen and one more row, which tells if there is more
+        self.rows = deque(maxlen=max(max_rows, self.usable_height + 1))
+        self.first = 0 # number of the row self.rows[0]
+        self.source = iter(())
+        self.exhausted = False
+        self.truncated = False # content was interrupted, it cannot be continued
+        self.pattern = None
+        self.status = None # message displayed by the next prompt
+        self.error = None  # exception raised by the content while prefetching
 
     def trim_line(self, line):
-        elip = Line(colorama.Style.DIM + '...' + colorama.Style.RESET_ALL)
+        if not self.interactive:
+            # nothing is lost when output is not a screen
+            return line
+        if line.fits(self.page_width):
+            return line
+        elip = Line(colorama.Style.DIM + '...' + colorama.Style.RESET_ALL, 3)
+        line = line.trim(self.page_width - len(elip)) + elip
         if len(line) > self.page_width:
-            line = line.trim(self.page_width - len(elip)) + elip
+            # screen is narrower than the ellipsis
             line = line.trim(self.page_width)
         return line
 
-    def print_line(self, line):
+    def format_line(self, line):
         line = self.trim_line(line)
-        sys.stdout.write(str(line))
         line_len = len(line)
         last_row_len = line_len % self.page_width
-        if not line_len or last_row_len:
+        if not line_len or last_row_len or not self.interactive:
             # add extra CR/CRLF if line doesn't cover entire width
             # this does matter under Window and is meaningless under Linus
-            print()
+            return str(line) + '\n'
+        return str(line)
 
-    def prompt(self):
-        hint = f"Press Q/ESC{['', '/NUMBER'][self.numeric]} to stop or any other key to continue..."
+    @property
+    def end(self):
+        """Number of the rows rendered so far."""
+        return self.first + len(self.rows)
+
+    def fetch(self, end, cancelled=None):
+        """Pull rows of the content until there are `end` of them.
+        Return False if content is exhausted earlier."""
+        while self.end < end:
+            if self.exhausted:
+                return False
+            if cancelled is not None and cancelled.is_set():
+                return True
+            # row which failed while prefetching is pulled again in this thread
+            error, self.error = self.error, None
+            try:
+                line = next(self.source)
+            except StopIteration:
+                if error is not None:
+                    # content cannot be resumed after the error, e.g. generator
+                    raise error
+                self.exhausted = True
+                return False
+            except KeyboardInterrupt:
+                # if raised in a generator, it has been finalized
+                self.exhausted = self.truncated = True
+                raise
+            if len(self.rows) == self.rows.maxlen:
+                self.first += 1
+            self.rows.append(line)
+        return True
+
+    def screen(self, top):
+        """Return rows displayed on the screen starting from row `top`."""
+        self.fetch(top + self.usable_height)
+        # rows above might have been dropped, e.g. by prefetching
+        start = max(top - self.first, 0)
+        rows = islice(self.rows, start, start + self.usable_height)
+        return [self.format_line(Line(row)) for row in rows]
+
+    def prompt(self, screen, more):
+        """Display the screen followed by the prompt and return the key pressed."""
+        stop_keys = f"Q/ESC{['', '/NUMBER'][self.numeric]}"
+        if more:
+            hint = f"Press {stop_keys} to stop, B/G to go back/home, :// to jump/search or any other key to continue..."
+        elif self.truncated:
+            hint = "(INTERRUPTED) Press B/G to go back/home, :// to jump/search or any other key to stop..."
+        else:
+            hint = "(END) Press B/G to go back/home, :// to jump/search or any other key to stop..."
+        if self.status:
+            hint = f"{self.status}. {hint}"
+            self.status = None
         line = str(self.trim_line(Line(hint)))
-        terminal.print_help(line, end='')
-        sys.stdout.flush()
+        terminal.write(''.join(screen) + terminal.style(colorama.Fore.LIGHTYELLOW_EX, line))
+        terminal.flush()
         try:
-            key = getch()
-            ESC = '\x1b'
-            CTRL_C = '\x03'
-            terminating_keys = [ESC, CTRL_C, 'q', 'Q']
-            numbers = [str(x) for x in range(10)]
-            if self.numeric:
-                terminating_keys += numbers
-                if key in numbers:
-                    terminal.prefill_input(key)
-            interrupted = key in terminating_keys
+            key = terminal.getch()
         except KeyboardInterrupt:
-            interrupted = True
-        sys.stdout.write('\r' + ' '*(len(line)) + '\r')
-        sys.stdout.flush()
-        return interrupted
+            key = CTRL_C
+        # sent together with the next screen or the final flush
+        terminal.write('\r' + ' '*(len(line)) + '\r')
+        return key
 
-    def execute_start_page_callback(self):
-        self.start_page_callback[0](*self.start_page_callback[1:])
+    def jump(self, top):
+        """Ask for the index and return number of the row to be displayed on top."""
+        try:
+            index = int(terminal.read(':')) - self.index_base
+        except (ValueError, EOFError, KeyboardInterrupt):
+            return top
+        index = max(index, self.first)
+        if not self.fetch(index + 1):
+            # beyond the end, show the last screen
+            index = max(self.end - self.usable_height, self.first)
+        return index
 
-    def page(self, lines):
-        footer_height = 1 # reserve one line for the prompt
-        usable_height = (self.page_height - footer_height)
-        self.execute_start_page_callback()
+    def read_pattern(self):
+        """Ask for the regular expression to be searched for. Invalid
+        expressions are searched for as plain text."""
+        try:
+            text = terminal.read('/')
+        except (EOFError, KeyboardInterrupt):
+            return
+        if not text:
+            return # keep previous pattern
+        try:
+            self.pattern = re.compile(text)
+        except re.error:
+            self.pattern = re.compile(re.escape(text))
 
-        for line_idx, line in enumerate(lines):
-            end_page = (line_idx + 1) % usable_height == 0
+    def matches(self, number):
+        return self.pattern.search(Line(self.rows[number - self.first]).no_colors())
 
-            self.print_line(Line(line))
+    def search(self, top, backward=False):
+        """Return number of the row matching the pattern, the nearest one after
+        (or before) `top`. Rows are pulled from the content only until the
+        match is found. Return None if there is no match."""
+        if self.pattern is None:
+            return None
 
-            if end_page:
-                if self.prompt():
+        if backward:
+            numbers = range(min(top, self.end) - 1, self.first - 1, -1)
+        else:
+            numbers = count(max(top + 1, self.first))
+
+        try:
+            for number in numbers:
+                if number >= self.end and not self.fetch(number + 1):
                     break
-                else:
-                    self.execute_start_page_callback()
-                    terminal.clear()
+                if self.matches(number):
+                    return number
+            self.status = f"Pattern not found: {self.pattern.pattern}"
+        except KeyboardInterrupt:
+            self.status = "Search interrupted"
+
+        return None
+
+    def prefetch(self, end):
+        """Pull rows up to `end` in a background thread, e.g. while user reads
+        the screen. Return function which cancels prefetching and optionally
+        waits until the row being pulled is ready."""
+        cancelled = threading.Event()
+
+        def work():
+            try:
+                self.fetch(end, cancelled)
+            except Exception as ex:
+                self.error = ex
+
+        thread = threading.Thread(target=work, name='peepshow-prefetch', daemon=True)
+        thread.start()
+
+        def cancel(wait=True):
+            cancelled.set()
+            if wait:
+                thread.join()
+        return cancel
+
+    def page(self, lines):
+        # each screen is composed in a buffer and written at once
+        self.source = iter(lines)
+        top = 0
+        screen = None
+        while True:
+            if screen is None:
+                screen = self.screen(top)
+                more = self.fetch(top + self.usable_height + 1)
+
+            if not self.interactive:
+                terminal.write(''.join(screen) + ('...\n' if more else ''))
+                break
+
+            if top == 0 and not more:
+                # everything fits on the first screen
+                terminal.write(''.join(screen))
+                break
+
+            if more and prefetch_enabled:
+                cancel_prefetch = self.prefetch(top + 2 * self.usable_height + 1)
+                key = None
+                try:
+                    key = self.prompt(screen, more)
+                finally:
+                    # rows are not needed any more if paging stops
+                    cancel_prefetch(wait=key is not None and key not in STOP_KEYS)
+            else:
+                key = self.prompt(screen, more)
+
+            keep_screen = False
+            if key in STOP_KEYS:
+                break
+            elif self.numeric and key.isdigit():
+                terminal.prefill_input(key)
+                break
+            elif key in ('b', 'B'):
+                top = max(top - self.usable_height, self.first)
+            elif key in ('g', 'G'):
+                top = self.first
+            elif key == ':':
+                top = self.jump(top)
+            elif key in ('/', 'n', 'N'):
+                if key == '/':
+                    self.read_pattern()
+                found = self.search(top, backward=key == 'N')
+                # if nothing is found, the same screen is displayed again,
+                # even if its rows have been dropped while searching
+                keep_screen = found is None
+                top = top if keep_screen else found
+            elif more:
+                top += self.usable_height
+            else:
+                break
+            if not keep_screen:
+                # rows on the screen might have been dropped while pulling further ones
+                top = max(top, self.first)
+                screen = None
+            terminal.clear()
 
-        sys.stdout.flush()
+        terminal.flush()
 
 def page(content):
     p = Pager()
@@ -1,21 +1,107 @@
+import sys
+from peepshow.core import switch, sites
+from peepshow.utils.system import breakpoint_disabled_by_env
 
-def peep(*args):
+def peep(*args, when=None, nth=None, after=None):
     """Examine local data.
     peep()   # examine all variables in the scope (locals cover globals)
     peep(x)  # examine x (name will be determined only if possible)
+
+    Optionally session is opened only if:
+    when:  condition is satisfied, expression given as a string is evaluated
+           in context of the caller
+    nth:   this is N-th time when condition is satisfied at this call site
+    after: condition has been already satisfied N times at this call site
+    """
+
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    if not _triggered(frame, when, nth, after):
+        return
+
+    _peep(frame, args, 0)
+
+
+def peep_if(condition, *args, nth=None, after=None):
+    """Examine local data if condition is satisfied.
+    peep_if(x > 3, x)     # condition evaluated by the caller
+    peep_if('x > 3', x)   # condition compiled once and evaluated by peep_if
+    See peep() for other arguments.
     """
 
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    if not _triggered(frame, condition, nth, after):
+        return
+
+    _peep(frame, args, 1)
+
+
+def breakpoint(*args, **kwargs):
+    """Examine local data of the caller of breakpoint().
+    Can be used as sys.breakpointhook, e.g. by PYTHONBREAKPOINT=peepshow.breakpoint
+    breakpoint()   # examine all variables in the scope
+    breakpoint(x)  # examine x (name will be determined only if possible)
+    Keyword arguments (like `header` of pdb.set_trace) are ignored.
+    """
+
+    # breakpoint() and sys.breakpointhook are built-ins, they have no frames
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    _peep(frame, args, 0)
+
+
+def install_breakpoint():
+    """Make built-in breakpoint() call peepshow.breakpoint().
+    PYTHONBREAKPOINT=0 is respected, breakpoint() does nothing then.
+    """
+
+    sys.breakpointhook = breakpoint
+
+
+def _triggered(frame, when, nth, after):
+    """Evaluate condition and update hit counter of the call site."""
+    if isinstance(when, str):
+        from peepshow.utils.python import compile_expr
+        when = eval(compile_expr(when), frame.f_globals, frame.f_locals)
+    elif when is None:
+        when = True
+
+    if not when:
+        return False
+
+    if nth is None and after is None:
+        return True
+
+    return sites.get_site(frame).hit(nth, after)
+
+
+def _peep(frame, args, names_offset):
     from peepshow.core import peep as core
+    from peepshow.core import captures
     from peepshow.utils import python as utils
     from peepshow.core.trans import GloLoc, Given
 
     if len(args) > 1:
         raise TypeError("Too many arguments.")
 
-    env = utils.caller_gloloc()
+    if captures.should_capture():
+        if args:
+            captures.capture(frame, args[0], utils.frame_arg_names(frame)[names_offset])
+        else:
+            captures.capture(frame)
+        return
+
+    env = utils.frame_gloloc(frame)
 
     if args:
-        expr = utils.arg_names()[0]
+        expr = utils.frame_arg_names(frame)[names_offset]
         target = Given(args[0], expr)
     else:
         target = GloLoc(env.initial)
@@ -23,33 +109,205 @@ def peep(*args):
     last_target = core.peep(target, env)
 
 
-def peep_(*args):
+def peep_(*args, when=None, nth=None, after=None):
     """Examine local data.
     peep_()     # examine all variables in the scope (locals cover globals)
     peep_('x')  # examine x (name will be known as it is explicitely given)
+    See peep() for other arguments.
     """
 
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    if not _triggered(frame, when, nth, after):
+        return
+
     from peepshow.core import peep as core
+    from peepshow.core import captures
     from peepshow.utils import python as utils
     from peepshow.core.trans import GloLoc, Given
 
     if len(args) > 1:
         raise TypeError("Too many arguments.")
 
-    expr = args[0]
-    env = utils.caller_gloloc()
+    env = utils.frame_gloloc(frame)
 
     if args:
+        expr = args[0]
         if not isinstance(expr, str):
             raise TypeError("Expression must be a string or None.")
 
         try:
-            target = eval(expr, {}, env.initial)
+            target = eval(utils.compile_expr(expr), {}, env.initial)
         except:
             raise SyntaxError('Invalid expression.')
 
+        if captures.should_capture():
+            captures.capture(frame, target, expr)
+            return
+
         target = Given(target, expr)
     else:
+        if captures.should_capture():
+            captures.capture(frame)
+            return
+
         target = GloLoc(env.initial)
 
     last_target = core.peep(target, env)
+
+
+def apeep(*args):
+    """Examine local data without blocking the event loop.
+    await apeep()   # examine all variables in the scope (locals cover globals)
+    await apeep(x)  # examine x (name will be determined only if possible)
+
+    Session runs in a separate thread while the event loop keeps running.
+    Objects owned by the loop can be accessed in the session through
+    in_loop(func, *args), which executes func (or awaits a coroutine) in the loop.
+    """
+
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return switch.anoop()
+
+    import asyncio
+    import threading
+    from functools import partial
+    from peepshow.core import peep as core
+    from peepshow.utils import python as utils
+    from peepshow.core.trans import GloLoc, Given
+
+    if len(args) > 1:
+        raise TypeError("Too many arguments.")
+
+    env = utils.frame_gloloc(frame)
+
+    if args:
+        expr = utils.frame_arg_names(frame)[0]
+        target = Given(args[0], expr)
+    else:
+        target = GloLoc(env.initial)
+
+    loop = asyncio.get_event_loop()
+    env.update({'in_loop': partial(utils.in_loop, loop)})
+    future = loop.create_future()
+
+    def resolve(setter, value):
+        if not future.done(): # e.g. cancelled
+            setter(value)
+
+    def session():
+        try:
+            core.peep(target, env)
+        except BaseException as ex: # including SystemExit caused by 'Quit'
+            loop.call_soon_threadsafe(resolve, future.set_exception, ex)
+        else:
+            loop.call_soon_threadsafe(resolve, future.set_result, None)
+
+    threading.Thread(target=session, name='peepshow-session', daemon=True).start()
+    return future
+
+
+def peep_batch(commands, *args, output=None):
+    """Examine local data by executing given commands, without user interaction.
+    peep_batch(['dir', '.x'], y)   # commands given as a list
+    peep_batch('commands.txt')     # commands read from a file, one per line
+
+    Result of the commands is written as plain text to `output` stream.
+    If `output` is not given, result is returned as a string.
+    """
+
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    import io
+    from peepshow.core import peep as core
+    from peepshow.utils import python as utils
+    from peepshow.utils import terminal
+    from peepshow.core.trans import GloLoc, Given
+
+    if len(args) > 1:
+        raise TypeError("Too many arguments.")
+
+    if isinstance(commands, str):
+        with open(commands) as fh:
+            lines = (line.strip() for line in fh)
+            commands = [line for line in lines if line and not line.startswith('#')]
+
+    env = utils.frame_gloloc(frame)
+
+    if args:
+        try:
+            expr = utils.frame_arg_names(frame)[1]
+        except Exception:
+            # e.g. when the call is nested in another one
+            expr = 'target'
+        target = Given(args[0], expr)
+    else:
+        target = GloLoc(env.initial)
+
+    stream = io.StringIO() if output is None else output
+    with terminal.use_console(terminal.Script(commands, stream)):
+        core.peep(target, env)
+
+    if output is None:
+        return stream.getvalue()
+
+
+def capture_threads(enabled=True, max_captures=None):
+    """Let peep() and peep_() invoked by threads other than the main one store
+    a capture of the target and variables instead of blocking at the prompt.
+    Captures are kept in a queue of max_captures items (1000 by default),
+    excessive ones are dropped. Use inspect_captures() to examine them.
+    Capturing can be also enabled by PEEPSHOW_CAPTURE_THREADS=1.
+    """
+
+    from peepshow.core import captures
+    captures.set_enabled(enabled, max_captures)
+
+
+def inspect_captures():
+    """Examine captures made by other threads, one by one, starting from the
+    oldest one. Use 'Continue' to proceed to the next capture.
+    Return number of examined captures.
+    """
+
+    from peepshow.core import peep as core
+    from peepshow.core import captures
+    from peepshow.core.env import Env
+    from peepshow.core.trans import Given
+
+    count = 0
+    while True:
+        capture = captures.pop()
+        if capture is None:
+            break
+        env = Env(capture.glo, capture.loc)
+        env.update({'capture': capture})
+        core.peep(Given(capture, 'capture'), env)
+        count += 1
+    return count
+
+
+def listen(path=None):
+    """Let other processes open peep sessions in this one, by:
+    python -m peepshow attach <PID>
+    Sessions are served by background threads, over a Unix domain socket
+    accessible only to the owner of the process. Return path of the socket.
+    """
+
+    from peepshow.core import remote
+    return remote.listen(path)
+
+
+if switch.disabled_by_env:
+    # resolved once, so that each call costs nothing more than a call to noop
+    peep = peep_ = peep_if = peep_batch = listen = switch.noop
+    capture_threads = inspect_captures = switch.noop
+    apeep = switch.anoop
+
+if switch.disabled_by_env or breakpoint_disabled_by_env:
+    breakpoint = switch.noop
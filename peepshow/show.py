@@ -1,3 +1,8 @@
+import sys
+from types import SimpleNamespace
+from functools import lru_cache
+from peepshow.core import switch, sites
+from peepshow.core.sinks import TextSink, BackgroundSink, JsonSink
 
 def show(*args, **kwargs):
     """show(x, y, z=z) # print names & values of arguments
@@ -5,6 +10,32 @@ def show(*args, **kwargs):
     names of kwargs will be known as it is explicitely given
     """
 
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    from peepshow.core import show as core
+    _show(frame, core.options, args, kwargs)
+
+def show_(*args, **kwargs):
+    """show_('x', 'y', z='z') # print names & values of arguments
+    values of args and kwargs are expressions to be evaluated in context of the caller
+    values of args become names to be displayed
+    names of kwargs become names to be displayed
+    """
+
+    frame = sys._getframe(1)
+    if not switch.is_enabled(frame):
+        return
+
+    from peepshow.core import show as core
+    _show_(frame, core.options, args, kwargs)
+
+def _show(frame, options, args, kwargs):
+    site = sites.get_site(frame)
+    if not site.admit(options.every, options.per_second, options.first):
+        return
+
     import miscutils.insp as insp
     from peepshow.core import show as core
     from peepshow.utils import python as utils
@@ -12,32 +43,30 @@ def show(*args, **kwargs):
     if args or kwargs:
         # show specified variables
         if args:
-            names = utils.arg_names()
+            names = utils.frame_arg_names(frame)
         else:
             names = []
         names += [*kwargs.keys()]
         values = [*args] + [*kwargs.values()]
     else:
         # show all the user variables in scope of the caller
-        env = utils.caller_gloloc()
+        env = utils.frame_gloloc(frame)
         is_user_var = lambda item: not insp.isaccess(item[0]).special
         user_vars = filter(is_user_var, env.initial.items())
         names, values = zip(*user_vars)
 
-    core.show(names, values)
+    core.show(names, values, site, options)
 
-def show_(*args, **kwargs):
-    """show_('x', 'y', z='z') # print names & values of arguments
-    values of args and kwargs are expressions to be evaluated in context of the caller
-    values of args become names to be displayed
-    names of kwargs become names to be displayed
-    """
+def _show_(frame, options, args, kwargs):
+    site = sites.get_site(frame)
+    if not site.admit(options.every, options.per_second, options.first):
+        return
 
     import miscutils.insp as insp
     from peepshow.core import show as core
     from peepshow.utils import python as utils
 
-    env = utils.caller_gloloc()
+    env = utils.frame_gloloc(frame)
 
     if args or kwargs:
         # show specified variables
@@ -48,11 +77,78 @@ def show_(*args, **kwargs):
             if not isinstance(expr, str):
                 raise TypeError("Each expression must be a string.")
 
-        values = [eval(expr, env.glo, env.loc) for expr in exprs]
+        values = [eval(utils.compile_expr(expr), env.glo, env.loc) for expr in exprs]
     else:
         # show all the user variables in scope of the caller
         is_user_var = lambda item: not insp.isaccess(item[0]).special
         user_vars = filter(is_user_var, env.initial.items())
         names, values = zip(*user_vars)
 
-    core.show(names, values)
+    core.show(names, values, site, options)
+
+def configure(**options):
+    """Change default behavior of show/show_.
+    configure(only_changes=True)  # show values only when they change
+    configure(every=10)           # show only every 10th call from each place
+    configure(per_second=5)       # show at most 5 calls per second from each place
+    configure(first=3)            # show only first 3 calls from each place
+    configure(sink=BackgroundSink())  # format & print in a background thread
+    configure(sink=(TextSink(), JsonSink('show.jsonl')))  # print & log as JSON
+    """
+    from peepshow.core import show as core
+
+    core.Options(core.options, **options) # validate
+    for name, value in options.items():
+        setattr(core.options, name, value)
+
+def using(**options):
+    """Return show/show_ functions which behave differently than by default.
+    using(every=100).show(x)  # accepts the same options as configure()
+    Results are reused if only scalar options are given. Otherwise, e.g. for
+    sinks, keep the returned object instead of calling using() repeatedly.
+    """
+    if all(isinstance(value, _scalars) for value in options.values()):
+        return _using_cached(**options)
+    return _using(**options)
+
+_scalars = (type(None), bool, int, float, str)
+
+def _using(**options):
+    from peepshow.core import show as core
+
+    if switch.disabled_by_env:
+        return SimpleNamespace(show=switch.noop, show_=switch.noop)
+
+    options = core.Options(core.options, **options)
+
+    def show(*args, **kwargs):
+        frame = sys._getframe(1)
+        if switch.is_enabled(frame):
+            _show(frame, options, args, kwargs)
+
+    def show_(*args, **kwargs):
+        frame = sys._getframe(1)
+        if switch.is_enabled(frame):
+            _show_(frame, options, args, kwargs)
+
+    return SimpleNamespace(show=show, show_=show_)
+
+_using_cached = lru_cache(maxsize=128)(_using)
+
+def enable(*modules):
+    """Enable show/peep functions.
+    enable()              # everywhere
+    enable('pkg', 'mod')  # only in given modules and their submodules
+    """
+    switch.set_enabled(True, modules)
+
+def disable(*modules):
+    """Disable show/peep functions.
+    disable()              # everywhere
+    disable('pkg', 'mod')  # only in given modules and their submodules
+    """
+    switch.set_enabled(False, modules)
+
+if switch.disabled_by_env:
+    # resolved once, so that each call costs nothing more than a call to noop
+    show = show_ = switch.noop
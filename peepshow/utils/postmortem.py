@@ -0,0 +1,210 @@
+"""Snapshots of exceptions which can be examined after the process is gone.
+
+Snapshot consists of the exception chain, frames and their variables. Values
+are copied down to a limited depth and size. Objects other than built-in
+scalars and containers are replaced by stubs which keep their type, repr and
+(some of the) attributes. Thanks to that, snapshot can always be pickled and
+unpickled without the code of the application.
+"""
+import os
+import sys
+import time
+import types
+import pickle
+import reprlib
+from peepshow.utils.traceback import ExceptionSummary, FrameSummary, exception_chain
+
+FORMAT_VERSION = 1
+
+class Stub:
+    """Replacement for an object which is not stored in the snapshot.
+    Attributes of the original object (if captured) are attributes of the stub.
+    """
+
+    def __init__(self, type_name, repr_, attrs=None):
+        self._stub_type = type_name
+        self._stub_repr = repr_
+        if attrs:
+            vars(self).update(attrs)
+
+    def __repr__(self):
+        return self._stub_repr
+
+
+class FrameSnapshot(FrameSummary):
+    def __init__(self, file_name, line_no, callable_name, line, glo, loc):
+        self.frame = None
+        self.file_name = file_name
+        self.line_no = line_no
+        self.callable_name = callable_name
+        self._line = line
+        self._gloloc = None
+        self.glo = glo
+        self.loc = loc
+
+    @property
+    def gloloc(self):
+        if self._gloloc is None:
+            self._gloloc = {**self.glo, **self.loc}
+        return self._gloloc
+
+
+class ExceptionSnapshot(ExceptionSummary):
+    def __init__(self, type_name, message, exc_value, frames):
+        self.exc_type = None
+        self.exc_value = exc_value
+        self.tb = None
+        self.type_name = type_name
+        self.message = message
+        self._frames = frames
+        self._summaries = frames
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f'<ExceptionSnapshot for {self.type_name}>'
+
+
+_scalars = (type(None), bool, int, float, complex)
+_containers = (list, tuple, set, frozenset, dict)
+_opaque = (types.ModuleType, type, types.FunctionType, types.BuiltinFunctionType,
+           types.MethodType, types.CodeType, types.FrameType, types.TracebackType)
+
+def _type_name(obj):
+    type_ = type(obj)
+    if type_.__module__ == 'builtins':
+        return type_.__qualname__
+    return f'{type_.__module__}.{type_.__qualname__}'
+
+
+class Capture:
+    """Convert objects to their picklable, bounded copies.
+
+    max_depth:  depth of nested containers and attributes
+    max_items:  number of items taken from each container
+    max_string: length of strings, bytes and reprs
+    max_nodes:  total number of objects converted by this instance
+    """
+
+    def __init__(self, max_depth=4, max_items=100, max_string=1000, max_nodes=20000):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string = max_string
+        self.remaining = max_nodes
+        self.memo = {} # id -> converted object, keeps shared objects shared
+        self.repr = reprlib.Repr()
+        self.repr.maxstring = self.repr.maxother = max_string
+
+    def stub(self, obj, attrs=None):
+        try:
+            repr_ = self.repr.repr(obj)
+        except Exception:
+            repr_ = f'<{_type_name(obj)} object>'
+        return Stub(_type_name(obj), repr_, attrs)
+
+    def convert(self, obj, depth=0):
+        type_ = type(obj)
+        if type_ in _scalars:
+            return obj
+        if type_ in (str, bytes):
+            if len(obj) > self.max_string:
+                return obj[:self.max_string] + ('...' if type_ is str else b'...')
+            return obj
+
+        try:
+            return self.memo[id(obj)]
+        except KeyError:
+            pass
+
+        self.remaining -= 1
+        if depth >= self.max_depth or self.remaining <= 0:
+            ret = self.stub(obj)
+        elif type_ in _containers:
+            ret = self._convert_container(obj, depth + 1)
+        elif isinstance(obj, _opaque):
+            ret = self.stub(obj)
+        else:
+            try:
+                attrs = vars(obj)
+            except TypeError:
+                attrs = None
+            else:
+                attrs = self.convert_dict(attrs, depth + 1)
+            ret = self.stub(obj, attrs)
+
+        self.memo[id(obj)] = ret
+        return ret
+
+    def _convert_container(self, obj, depth):
+        if isinstance(obj, dict):
+            return self.convert_dict(obj, depth)
+        items = [self.convert(item, depth) for item, _ in zip(obj, range(self.max_items))]
+        if len(obj) > self.max_items:
+            items.append(...)
+        try:
+            return type(obj)(items)
+        except TypeError: # unhashable stub in a set
+            return self.stub(obj)
+
+    def convert_dict(self, obj, depth, skip=()):
+        ret = {}
+        for key, value in obj.items():
+            if len(ret) >= self.max_items:
+                ret[...] = ...
+                break
+            if key in skip:
+                continue
+            try:
+                ret[self.convert(key, depth)] = self.convert(value, depth)
+            except TypeError: # unhashable key
+                pass
+        return ret
+
+    def frame(self, frame):
+        code = frame.f_code
+        summary = FrameSummary(frame)
+        loc = self.convert_dict(frame.f_locals, 1)
+        glo = self.convert_dict(frame.f_globals, 1, skip=('__builtins__',))
+        return FrameSnapshot(code.co_filename, frame.f_lineno, code.co_name, summary.line, glo, loc)
+
+    def exception(self, exc_type, exc_value, tb):
+        summary = ExceptionSummary(exc_type, exc_value, tb)
+        # innermost frames matter most, they get the budget first
+        frames = [self.frame(frame) for frame in reversed(summary._frames)][::-1]
+        try:
+            message = str(exc_value)
+        except Exception:
+            message = ''
+        return ExceptionSnapshot(exc_type.__name__, message, self.convert(exc_value), frames)
+
+
+def capture(exc_type, exc_value, tb, **limits):
+    """Return list of ExceptionSnapshot objects, one per exception in the chain."""
+    capture = Capture(**limits)
+    return [capture.exception(*exc) for exc in exception_chain(exc_type, exc_value, tb)]
+
+def dump(exc_stack, path):
+    content = {
+        'version': FORMAT_VERSION,
+        'time': time.time(),
+        'pid': os.getpid(),
+        'argv': list(sys.argv),
+        'exceptions': exc_stack,
+    }
+    with open(path, 'wb') as fh:
+        pickle.dump(content, fh, protocol=pickle.DEFAULT_PROTOCOL)
+
+def load(path):
+    """Return list of ExceptionSnapshot objects stored in the file.
+    Snapshots are pickles, so only files from trusted sources should be loaded.
+    """
+    with open(path, 'rb') as fh:
+        content = pickle.load(fh)
+    if content.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {content.get('version')}")
+    return content['exceptions']
+
+def snapshot_path(directory):
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return os.path.join(directory, f'peepshow-{stamp}-{os.getpid()}.snapshot')
@@ -0,0 +1,220 @@
+"""Pretty printer which is aware of its budget.
+
+Object is traversed lazily, line by line. Depth of the traversal, number of
+items shown from each container, length of the strings and total size of the
+output are limited. Parts which exceed the limits are replaced by '...'.
+"""
+from collections import deque, OrderedDict, defaultdict
+
+ELLIPSIS = '...'
+
+_brackets = {
+    list: ('[', ']'),
+    tuple: ('(', ')'),
+    set: ('{', '}'),
+    frozenset: ('frozenset({', '})'),
+    dict: ('{', '}'),
+    deque: ('[', ']'),
+    type({}.keys()): ('[', ']'),
+    type({}.values()): ('[', ']'),
+    type({}.items()): ('[', ']'),
+}
+
+# printed as `name([...])`, also when they are not subclassed
+_named = (deque, type({}.keys()), type({}.values()), type({}.items()))
+
+def _base_type(obj):
+    """Return built-in container type which is used for printing the object,
+    or None if object should be printed by its own repr().
+    """
+    for base in _brackets:
+        if isinstance(obj, base):
+            type_ = type(obj)
+            if type_.__repr__ is base.__repr__ or type_.__module__ == 'collections':
+                return base
+            return None
+    return None
+
+def _sorted(items, key=None):
+    try:
+        return sorted(items, key=key)
+    except Exception:
+        return items
+
+
+class PrettyPrinter:
+
+    def __init__(self, width=80, indent=4, max_depth=20, max_items=1000,
+                 max_string=10000, max_bytes=100000):
+        self.width = width
+        self.indent = ' ' * indent
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string = max_string
+        self.max_bytes = max_bytes
+
+    def pformat(self, obj):
+        return '\n'.join(self.lines(obj))
+
+    def lines(self, obj):
+        """Yield lines of the output. If max_bytes is exceeded, last line is
+        replaced by '...' and the traversal stops.
+        """
+        size = 0
+        for line in self._lines(obj, '', '', '', 0, set()):
+            size += len(line) + 1
+            if self.max_bytes is not None and size > self.max_bytes:
+                yield ELLIPSIS
+                break
+            yield line
+
+    def _scalar(self, obj):
+        if obj is ...:
+            # also a marker of items omitted from snapshots
+            return ELLIPSIS
+        if isinstance(obj, (str, bytes, bytearray)) and len(obj) > self.max_string:
+            return repr(obj[:self.max_string]) + ELLIPSIS
+        text = repr(obj)
+        if len(text) > self.max_string:
+            text = text[:self.max_string] + ELLIPSIS
+        return text
+
+    def _items(self, obj, base):
+        """Return items to be shown and flag indicating if there are more."""
+        truncated = len(obj) > self.max_items
+        if base is dict:
+            items = obj.items()
+            if not truncated and not isinstance(obj, OrderedDict):
+                items = _sorted(items, key=lambda item: item[0])
+        elif base in (set, frozenset) and not truncated:
+            items = _sorted(obj)
+        else:
+            items = obj
+        if truncated:
+            items = (item for item, _ in zip(items, range(self.max_items)))
+        return items, truncated
+
+    def _brackets(self, obj, base):
+        """Return opening and closing brackets, including type name for
+        subclasses of built-in containers and their state shown by repr()."""
+        type_ = type(obj)
+        opening, closing = _brackets[base]
+        if isinstance(obj, defaultdict):
+            return f'{type_.__name__}({obj.default_factory!r}, {opening}', f'{closing})'
+        if isinstance(obj, deque) and obj.maxlen is not None:
+            return f'{type_.__name__}({opening}', f'{closing}, maxlen={obj.maxlen})'
+        if type_ is not base or base in _named:
+            return f'{type_.__name__}({opening}', f'{closing})'
+        return opening, closing
+
+    def _wrap(self, obj, base, inner):
+        """Add brackets around inner text."""
+        if base in (set, frozenset) and not inner:
+            return f'{type(obj).__name__}()'
+        if base is tuple and len(obj) == 1 and type(obj) is tuple:
+            inner += ','
+        opening, closing = self._brackets(obj, base)
+        return f'{opening}{inner}{closing}'
+
+    def _special(self, obj, base, depth, stack):
+        """Return marker for the container which shouldn't be expanded."""
+        if id(obj) in stack:
+            return f'<Recursion on {type(obj).__name__} with id={id(obj)}>'
+        if depth >= self.max_depth and obj:
+            return self._wrap(obj, base, ELLIPSIS)
+        return None
+
+    def _flat(self, obj, limit, depth, stack):
+        """Return one-line representation of the object or None if it would
+        be longer than limit.
+        """
+        base = _base_type(obj)
+        if base is None:
+            text = self._scalar(obj)
+            return text if len(text) <= limit and '\n' not in text else None
+
+        special = self._special(obj, base, depth, stack)
+        if special is not None:
+            return special if len(special) <= limit else None
+
+        stack.add(id(obj))
+        try:
+            parts = []
+            length = 0
+            items, truncated = self._items(obj, base)
+            for item in items:
+                if base is dict:
+                    key = self._flat(item[0], limit - length, depth + 1, stack)
+                    value = None if key is None else \
+                        self._flat(item[1], limit - length - len(key), depth + 1, stack)
+                    part = None if value is None else f'{key}: {value}'
+                else:
+                    part = self._flat(item, limit - length, depth + 1, stack)
+                if part is None:
+                    return None
+                parts.append(part)
+                length += len(part) + 2
+                if length > limit:
+                    return None
+            if truncated:
+                parts.append(ELLIPSIS)
+        finally:
+            stack.discard(id(obj))
+
+        text = self._wrap(obj, base, ', '.join(parts))
+        return text if len(text) <= limit else None
+
+    def _lines(self, obj, indent, prefix, suffix, depth, stack):
+        limit = self.width - len(indent) - len(prefix) - len(suffix)
+        flat = self._flat(obj, limit, depth, stack)
+        if flat is not None:
+            yield indent + prefix + flat + suffix
+            return
+
+        base = _base_type(obj)
+        special = None if base is None else self._special(obj, base, depth, stack)
+        if base is None or special is not None:
+            text = self._scalar(obj) if special is None else special
+            lines = text.splitlines() or ['']
+            for line in lines[:-1]:
+                yield indent + prefix + line
+                prefix = ''
+            yield indent + prefix + lines[-1] + suffix
+            return
+
+        opening, closing = self._brackets(obj, base)
+        yield indent + prefix + opening
+        inner_indent = indent + self.indent
+        stack.add(id(obj))
+        try:
+            items, truncated = self._items(obj, base)
+            for item in items:
+                if base is dict:
+                    key, value = item
+                    key_str = self._flat(key, self.width, depth + 1, stack)
+                    if key_str is None:
+                        key_str = self._scalar(key).splitlines()[0]
+                    yield from self._lines(value, inner_indent, f'{key_str}: ', ',', depth + 1, stack)
+                else:
+                    yield from self._lines(item, inner_indent, '', ',', depth + 1, stack)
+            if truncated:
+                yield inner_indent + ELLIPSIS
+        finally:
+            stack.discard(id(obj))
+        yield indent + closing + suffix
+
+
+def pformat(obj, **limits):
+    """Format object as a string, see PrettyPrinter for available limits."""
+    return PrettyPrinter(**limits).pformat(obj)
+
+
+def rows(obj, width=80, **limits):
+    """Yield rows of formatted object. Lines longer than width are split into
+    several rows. Total size of the output is not limited, unless max_bytes is
+    given explicitly.
+    """
+    limits.setdefault('max_bytes', None)
+    for line in PrettyPrinter(width=width, **limits).lines(obj):
+        for start in range(0, max(len(line), 1), width):
+            yield line[start:start + width]
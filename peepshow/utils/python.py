@@ -1,16 +1,13 @@
-import inspect
-import ast
-import astunparse
-import astor
-import pprintpp
+import sys
+import copy
 from peepshow.utils.system import OS_BITS
-from textwrap import dedent
 from peepshow.core.env import Env
-from functools import wraps
+from peepshow.utils import pretty
+from functools import wraps, lru_cache
 from itertools import islice
-from pygments import highlight
-from pygments.lexers import PythonLexer
-from pygments.formatters import TerminalFormatter
+
+# modules needed for parsing and highlighting code are imported only when
+# needed, as they noticeably slow down `import peepshow`
 
 def always_assert(condition):
     """Assert which works also when code optimization is enabled"""
@@ -23,11 +20,12 @@ def caller_gloloc(level=2):
 
     level: 0 is current frame, 1 is the caller, 2 is caller of the caller
     """
-    caller_frame_info = inspect.stack()[level]
-    caller_frame = caller_frame_info.frame
-    glo = caller_frame.f_globals
-    loc = caller_frame.f_locals
-    return Env(glo, loc)
+    return frame_gloloc(sys._getframe(level))
+
+
+def frame_gloloc(frame):
+    """Return globals & locals of given frame."""
+    return Env(frame.f_globals, frame.f_locals)
 
 
 def arg_names(level=2):
@@ -38,16 +36,154 @@ def arg_names(level=2):
     level: 0 is current frame, 1 is the caller, 2 is caller of the caller
     """
     try:
-        caller_frame_info = inspect.stack()[level]
-        caller_context = caller_frame_info.code_context
-        code = dedent(''.join(caller_context))
-        tree = ast.parse(code, '', 'eval')
-        always_assert(isinstance(tree.body, ast.Call))
-        args = tree.body.args
-        names = [astunparse.unparse(arg).strip() for arg in args]
-        return names
-    except Exception as ex:
+        frame = sys._getframe(level)
+    except ValueError:
         raise Exception('Cannot determine arg names') from None
+    return frame_arg_names(frame)
+
+
+def frame_arg_names(frame):
+    """Like arg_names() but for the call which is being executed in given frame.
+    Results are cached per call site, so the source is parsed only once.
+    """
+    names = _call_site_arg_names(frame.f_code.co_filename, frame.f_lasti, frame.f_lineno)
+    if names is None:
+        raise Exception('Cannot determine arg names')
+    return [*names]
+
+
+@lru_cache(maxsize=1024)
+def _call_site_arg_names(file_name, lasti, lineno):
+    """Parse names of the arguments given at the call site. Return None if this
+    is not possible. `lasti` is not used directly, it only distinguishes
+    call sites located in the same line. File name is a part of the key, as
+    code objects of identical functions in different files compare equal.
+    """
+    import ast
+    import linecache
+    import astunparse
+    from textwrap import dedent
+
+    try:
+        line = linecache.getline(file_name, lineno)
+        tree = ast.parse(dedent(line), '', 'eval')
+        call = tree.body.value if isinstance(tree.body, ast.Await) else tree.body
+        always_assert(isinstance(call, ast.Call))
+        args = call.args
+        return tuple(astunparse.unparse(arg).strip() for arg in args)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=256)
+def compile_expr(expr, mode='eval'):
+    """Compile expression (or statements if mode is 'exec') given as a string.
+    Code objects are cached, so that evaluating the same expression many times
+    requires parsing it only once.
+    """
+    if mode == 'eval':
+        # the same as eval() does with strings
+        expr = expr.lstrip(' \t')
+    return compile(expr, '<string>', mode)
+
+
+def fingerprint(obj, budget=1000, max_depth=20, max_repr=1000):
+    """Return cheap structural fingerprint of the object. Fingerprints are
+    compared by ==, values of built-in scalars are a part of them.
+
+    Containers are traversed until `budget` items in total is visited. Those
+    which don't fit in the budget or are nested too deeply are represented only
+    by their identity and length. Other objects without attributes are
+    represented by their length and repr(), up to max_repr characters.
+    """
+    containers = (list, tuple, set, frozenset, dict)
+    scalars = (type(None), bool, int, float, complex, str, bytes)
+    remaining = budget
+
+    def walk(obj, depth):
+        nonlocal remaining
+        remaining -= 1
+        type_ = type(obj)
+
+        if type_ in scalars:
+            return (type_, obj)
+
+        if isinstance(obj, containers):
+            size = len(obj)
+            if size > remaining or depth >= max_depth:
+                return (type_, id(obj), size)
+            depth += 1
+            if isinstance(obj, dict):
+                return (type_, tuple((walk(k, depth), walk(v, depth)) for k, v in obj.items()))
+            if isinstance(obj, (set, frozenset)):
+                return (type_, frozenset(walk(x, depth) for x in obj))
+            return (type_, tuple(walk(x, depth) for x in obj))
+
+        try:
+            attrs = vars(obj)
+        except TypeError:
+            return (type_, _len(obj), _repr(obj, max_repr))
+        else:
+            return (type_, id(obj), walk(attrs, depth))
+
+    return walk(obj, 0)
+
+def _len(obj):
+    try:
+        return len(obj)
+    except Exception:
+        return None
+
+def _repr(obj, max_length):
+    try:
+        return repr(obj)[:max_length]
+    except Exception:
+        return None
+
+
+def snapshot(obj, depth=1, max_items=None):
+    """Return copy of the object which is not affected by later modifications
+    of the original, down to given depth. Depth 0 returns the object itself,
+    1 returns shallow copy. Containers are copied recursively, other objects
+    are copied shallowly or returned as they are if they cannot be copied.
+    If max_items is given, only that many items of each built-in container
+    are copied and `...` is added in place of the remaining ones. Other
+    objects which are longer are not copied at all.
+    """
+    if depth <= 0:
+        return obj
+
+    depth -= 1
+    type_ = type(obj)
+    truncated = False
+    if max_items is not None:
+        try:
+            truncated = len(obj) > max_items
+        except Exception:
+            pass
+    # items of the innermost containers are copied by C code, not one by one
+    if type_ in (list, tuple, set, frozenset):
+        items = islice(obj, max_items) if truncated else obj
+        if depth > 0:
+            items = (snapshot(x, depth, max_items) for x in items)
+        items = list(items)
+        if truncated:
+            items.append(...)
+        return items if type_ is list else type_(items)
+    if type_ is dict:
+        items = islice(obj.items(), max_items) if truncated else obj.items()
+        if depth > 0:
+            items = ((k, snapshot(v, depth, max_items)) for k, v in items)
+        ret = dict(items)
+        if truncated:
+            ret[...] = ...
+        return ret
+    if truncated:
+        return obj
+    try:
+        return copy.copy(obj)
+    except Exception:
+        return obj
 
 
 def id_to_str(id_):
@@ -116,8 +252,25 @@ def nth(iterable, index):
     """Get `index`-nth element from iterable."""
     return [*islice(iterable, index, index+1)][0]
 
+def in_loop(loop, func, *args):
+    """Execute func(*args) by the thread running the event loop and return
+    the result. Awaitable results (e.g. when func is a coroutine function) are
+    awaited. Coroutine can be also given directly instead of func."""
+    import asyncio
+    import inspect
+
+    async def call():
+        result = func if asyncio.iscoroutine(func) else func(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    return asyncio.run_coroutine_threadsafe(call(), loop).result()
+
 
 def prettify_expr(expr):
+    import ast
+    import astor
 
     def pretty_string(s, *args, **kwargs):
         return repr(s)
@@ -134,6 +287,10 @@ def prettify_expr(expr):
     return pretty
 
 def crayon_expr(expr):
+    from pygments import highlight
+    from pygments.lexers import PythonLexer
+    from pygments.formatters import TerminalFormatter
+
     return highlight(expr, PythonLexer(), TerminalFormatter()).strip()
 
 def exc_to_str(exc, show_type=False):
@@ -166,5 +323,6 @@ def exc_to_str(exc, show_type=False):
         return type_name
 
 def pformat(expr):
-    # alternatively: pprint.pformat
-    return pprintpp.pformat(expr)
+    # alternatively: pprint.pformat or pprintpp.pformat, but these don't limit
+    # the time and memory needed for printing huge objects
+    return pretty.pformat(expr)
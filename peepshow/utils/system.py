@@ -9,3 +9,8 @@ OS_IS_WINDOWS = os.name == 'nt'
 OS_BITS = 2**ceil(log2(log2(sys.maxsize)))
 
 dev_mode_enabled = bool(int(os.getenv('PEEPSHOW_DEV_MODE', 0)))
+disabled_by_env = bool(int(os.getenv('PEEPSHOW_DISABLED', 0)))
+capture_threads_by_env = bool(int(os.getenv('PEEPSHOW_CAPTURE_THREADS', 0)))
+breakpoint_disabled_by_env = os.getenv('PYTHONBREAKPOINT') == '0'
+prefetch_enabled = bool(int(os.getenv('PEEPSHOW_PREFETCH', 0)))
+cache_pages = int(os.getenv('PEEPSHOW_CACHE_PAGES', 100))
@@ -1,44 +1,177 @@
 import os
+import re
+import sys
+import shutil
+import threading
+from contextlib import contextmanager
 from colorama import Fore, Back, Style
 import colorama
 import rlcompleter
 import readline
-from peepshow.utils.system import OS_IS_WINDOWS
 
 _completer_suggestions = {}
 
+# move cursor home and erase the screen, translated by colorama under Windows
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+
 class Completer(rlcompleter.Completer):
     def complete_ex(self, *args, **kwargs):
         buf = readline.get_line_buffer().strip()
         if buf and buf[0] in ['!', '$']:
             return self.complete(*args, **kwargs)
 
+
+class Console:
+    """Interactive terminal used by peep."""
+
+    interactive = True # user responds to the prompts
+    local = True # terminal of this process, which can be also terminated
+
+    def init(self, suggestions):
+        update_suggestions(suggestions)
+        completer = Completer(_completer_suggestions)
+        readline.set_completer(completer.complete_ex)
+        readline.parse_and_bind("tab: complete")
+        colorama.init()
+        readline.set_history_length(1000)
+        self.clear()
+
+    def read(self, prompt):
+        return input(prompt)
+
+    def write(self, text):
+        sys.stdout.write(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+    def getch(self):
+        from getch import getch # py-getch package
+        return getch()
+
+    def clear(self):
+        # written together with the following output, no subprocess needed
+        self.write(CLEAR_SCREEN)
+
+    def size(self):
+        return shutil.get_terminal_size()
+
+    def prefill(self, text=None):
+        if text:
+            readline.set_startup_hook(lambda: readline.insert_text(text))
+        else:
+            readline.set_startup_hook()
+
+
+class Script(Console):
+    """Console which takes commands from a list and writes plain text.
+
+    commands: iterable of commands, exhausting it ends the session
+    output:   text stream, receives the prompts, commands and their results
+    width:    width assumed when formatting the output
+    max_rows: number of rows which can be printed by a single command
+    """
+
+    interactive = False
+    local = False
+    escapes = re.compile(r'\x1b\[[0-9;]*[A-Za-z]|[\001\002]')
+
+    def __init__(self, commands, output, width=80, max_rows=10000):
+        self.commands = iter(commands)
+        self.output = output
+        self.width = width
+        self.max_rows = max_rows
+
+    def init(self, suggestions):
+        pass
+
+    def read(self, prompt):
+        try:
+            cmd = next(self.commands)
+        except StopIteration:
+            raise EOFError from None
+        self.write(f'{prompt}{cmd}\n')
+        return cmd
+
+    def write(self, text):
+        self.output.write(self.escapes.sub('', text))
+
+    def flush(self):
+        self.output.flush()
+
+    def getch(self):
+        return 'q'
+
+    def clear(self):
+        pass
+
+    def size(self):
+        # one extra row is reserved by the pager for its prompt
+        return os.terminal_size((self.width, self.max_rows + 1))
+
+    def prefill(self, text=None):
+        pass
+
+
+_local = threading.local()
+_default_console = Console()
+
+def get_console():
+    """Return console used by peep in current thread."""
+    return getattr(_local, 'console', _default_console)
+
+@contextmanager
+def use_console(console):
+    """Make peep use given console in current thread."""
+    prev = get_console()
+    _local.console = console
+    try:
+        yield console
+    finally:
+        _local.console = prev
+
+def is_interactive():
+    return get_console().interactive
+
+def is_local():
+    return get_console().local
+
 def update_suggestions(suggestions):
     _completer_suggestions.update(suggestions)
 
 def init(suggestions):
-    update_suggestions(suggestions)
-    completer = Completer(_completer_suggestions)
-    readline.set_completer(completer.complete_ex)
-    readline.parse_and_bind("tab: complete")
-    colorama.init()
-    readline.set_history_length(1000)
-    clear()
+    get_console().init(suggestions)
+
+def read(prompt):
+    return get_console().read(prompt)
+
+def write(text):
+    get_console().write(text)
+
+def flush():
+    get_console().flush()
+
+def getch():
+    return get_console().getch()
+
+def size():
+    return get_console().size()
 
 def clear():
-    os.system('cls' if OS_IS_WINDOWS else 'clear')
+    get_console().clear()
+
+def echo(*args, sep=' ', end='\n'):
+    """Replacement of print() which writes to the current console."""
+    write(sep.join(map(str, args)) + end)
 
 def print_error(msg='', *args, **kwargs):
-    print(style(Back.RED + Fore.WHITE, msg), *args, **kwargs)
+    echo(style(Back.RED + Fore.WHITE, msg), *args, **kwargs)
 
 def print_help(msg='', *args, **kwargs):
-    print(style(Fore.LIGHTYELLOW_EX, msg), *args, **kwargs)
+    echo(style(Fore.LIGHTYELLOW_EX, msg), *args, **kwargs)
 
 def prefill_input(text=None):
-    if text:
-        readline.set_startup_hook(lambda: readline.insert_text(text))
-    else:
-        readline.set_startup_hook()
+    get_console().prefill(text)
 
 def style(spec, text, for_readline=False):
     # Thanks to Samuele Santi fot the article:
@@ -1,9 +1,11 @@
 import os
 import sys
+import linecache
 import traceback
 import warnings
-import inspect
+from functools import partial
 from peepshow.peep import peep
+from peepshow.utils.python import exc_to_str
 
 
 class ExceptionSummary:
@@ -11,17 +13,26 @@ class ExceptionSummary:
         self.exc_type = exc_type
         self.exc_value = exc_value
         self.tb = tb
-        frames = [t[0] for t in traceback.walk_tb(tb)]
-        self.frames = list(map(FrameSummary, frames))
-        
+        self._frames = [t[0] for t in traceback.walk_tb(tb)]
+        self._summaries = [None] * len(self._frames)
+
+    @property
+    def frames(self):
+        return list(self)
+
     def __str__(self):
         return str(self.exc_value)
-    
+
     def __repr__(self):
         return f'<ExceptionSummary for {self.exc_type.__name__}>'
 
     def __iter__(self):
-        yield from self.frames
+        # FrameSummary objects are created only when they are needed
+        for index, frame in enumerate(self._frames):
+            summary = self._summaries[index]
+            if summary is None:
+                summary = self._summaries[index] = FrameSummary(frame)
+            yield summary
 
 class FrameSummary:
     def __init__(self, frame):
@@ -29,14 +40,22 @@ class FrameSummary:
         self.line_no = frame.f_lineno
         self.file_name = frame.f_code.co_filename
         self.callable_name = frame.f_code.co_name
-        try:
-            with open(self.file_name) as fh:
-                lines = fh.readlines()
-                self.line = lines[self.line_no - 1].strip()
-        except Exception:
-            self.line = "<N/A>"
-            
-        self.gloloc = {**self.frame.f_globals, **self.frame.f_locals}
+        self._line = None
+        self._gloloc = None
+
+    @property
+    def line(self):
+        if self._line is None:
+            # linecache reads each file only once, regardless of number of frames
+            line = linecache.getline(self.file_name, self.line_no, self.frame.f_globals)
+            self._line = line.strip() or "<N/A>"
+        return self._line
+
+    @property
+    def gloloc(self):
+        if self._gloloc is None:
+            self._gloloc = {**self.frame.f_globals, **self.frame.f_locals}
+        return self._gloloc
 
     def __repr__(self):
         return f"{self.file_name}:{self.line_no} [{self.callable_name}] {self.line}"
@@ -51,34 +70,61 @@ class FrameSummary:
         return self.gloloc.values()
 
 
+def exception_chain(exc_type, exc_value, tb):
+    """Yield (type, value, traceback) of the exception and all the exceptions
+    during handling of which it occurred."""
+    while True:
+        yield exc_type, exc_value, tb
+        if exc_value.__context__ is None:
+            break
+        exc_value = exc_value.__context__
+        exc_type = type(exc_value)
+        tb = exc_value.__traceback__
+
 def peep_except_hook(exc_type, exc_value, traceback):
 
-    exc_stack = []
-    while True:
-        exc_stack.append(ExceptionSummary(exc_type, exc_value, traceback))
-        if exc_value.__context__ is not None:
-            exc_value = exc_value.__context__
-            exc_type = type(exc_value)
-            traceback = exc_value.__traceback__
-            continue
-        break 
-    
+    chain = exception_chain(exc_type, exc_value, traceback)
+    exc_stack = [ExceptionSummary(*exc) for exc in chain]
+
     if len(exc_stack) == 1:
         peep(exc_stack[0])
     else:    
         peep(exc_stack)
 
-def enable_except_hook(consider_env=False):
+def snapshot_except_hook(exc_type, exc_value, traceback, directory='.'):
+    """Save snapshot of the exception in given directory and print the
+    traceback as usual."""
+    from peepshow.utils import postmortem
+
+    try:
+        path = postmortem.snapshot_path(directory)
+        postmortem.dump(postmortem.capture(exc_type, exc_value, traceback), path)
+    except Exception as ex:
+        msg = f"peepshow: cannot save snapshot: {exc_to_str(ex, show_type=True)}"
+    else:
+        msg = f"peepshow: snapshot saved, run 'python -m peepshow {path}' to examine it"
+
+    sys.__excepthook__(exc_type, exc_value, traceback)
+    print(msg, file=sys.stderr)
+
+def enable_except_hook(consider_env=False, snapshot_dir=None):
+    """Examine uncaught exceptions with peep.
+    If snapshot_dir is given, snapshots of the exceptions are saved there
+    instead, to be examined later by 'python -m peepshow <SNAPSHOT>'.
+    If consider_env is set, hook is enabled only if PYTHON_PEEP_EXCEPTIONS=1,
+    and PYTHON_PEEP_SNAPSHOTS=<DIR> can be used instead of snapshot_dir.
+    """
     try:
         if consider_env:
             enable = bool(int(os.getenv('PYTHON_PEEP_EXCEPTIONS', 0)))
+            snapshot_dir = os.getenv('PYTHON_PEEP_SNAPSHOTS', snapshot_dir)
         else:
-            enable = true
+            enable = True
     except (ValueError, TypeError):
         warnings.warn("Invalid value of PYTHON_PEEP_EXCEPTIONS", RuntimeWarning)
     else:
         if enable:
-            sys.excepthook = peep_except_hook
-
-
-
+            if snapshot_dir is None:
+                sys.excepthook = peep_except_hook
+            else:
+                sys.excepthook = partial(snapshot_except_hook, directory=snapshot_dir)
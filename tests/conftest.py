@@ -0,0 +1,19 @@
+import io
+import pytest
+from peepshow.utils import terminal
+
+
+@pytest.fixture
+def use_console(monkeypatch):
+    """Return function which makes given console the default one."""
+    def use(console):
+        monkeypatch.setattr(terminal, '_default_console', console)
+        return console
+    return use
+
+@pytest.fixture
+def script(use_console):
+    """Return function which makes Script of given commands the default console."""
+    def make(commands):
+        return use_console(terminal.Script(commands, io.StringIO()))
+    return make
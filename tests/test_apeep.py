@@ -0,0 +1,44 @@
+import asyncio
+from peepshow import apeep
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class TestApeep:
+    def test_loop_keeps_running(self, script):
+        console = script(['!in_loop(ticks.copy)', "!in_loop(asyncio.sleep(0, 'slept'))", 'c'])
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(len(ticks))
+                await asyncio.sleep(0.001)
+
+        async def main():
+            task = asyncio.ensure_future(ticker())
+            value = [1, 2, 3]
+            await apeep(value)
+            task.cancel()
+
+        run(main())
+        out = console.output.getvalue()
+        assert '  value  ' in out
+        assert "'slept'" in out
+        assert len(ticks) > 0
+
+    def test_disabled(self, script):
+        console = script(['c'])
+        async def main():
+            from peepshow import disable, enable
+            disable()
+            try:
+                await apeep()
+            finally:
+                enable()
+        run(main())
+        assert console.output.getvalue() == ''
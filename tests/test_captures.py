@@ -0,0 +1,58 @@
+import threading
+import pytest
+from peepshow import peep, peep_, capture_threads, inspect_captures
+from peepshow.core import captures
+
+def run_in_thread(func):
+    thread = threading.Thread(target=func, name='worker')
+    thread.start()
+    thread.join()
+
+
+class TestCaptures:
+    @pytest.fixture
+    def output(self, script):
+        console = script(['.target', 'pp', 'c', '!counter', 'c'])
+        capture_threads(max_captures=2)
+        yield console.output
+        capture_threads(False, max_captures=1000)
+        while captures.pop():
+            pass
+
+    def test_captures(self, output):
+        def worker():
+            items = [1, 2]
+            peep(items)
+            items.append(3) # doesn't affect the capture
+            counter = 7
+            peep_()
+            peep()
+        run_in_thread(worker)
+
+        assert captures.pending() == 2
+        assert captures.dropped >= 1
+        assert inspect_captures() == 2
+        assert captures.pending() == 0
+
+        out = output.getvalue()
+        assert '[worker] ' in out
+        assert 'pp\n[1, 2]\n' in out
+        assert '> !counter\n7\n' in out
+
+    def test_resize_keeps_pending(self, output):
+        run_in_thread(lambda: peep(1))
+        run_in_thread(lambda: peep(2))
+        dropped = captures.dropped
+        capture_threads(max_captures=10)
+        assert captures.pending() == 2
+        capture_threads(max_captures=1)
+        assert captures.pending() == 1
+        assert captures.dropped == dropped + 1
+        assert captures.pop().target == 1
+
+    def test_disabled(self, output):
+        capture_threads(False)
+        def worker():
+            peep(1)
+        run_in_thread(worker)
+        assert captures.pending() == 0
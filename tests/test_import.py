@@ -0,0 +1,24 @@
+import sys
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parents[1]
+
+# imported only when needed for parsing, formatting or interaction
+LAZY_MODULES = ['astor', 'astunparse', 'pygments', 'colorama', 'readline', 'getch', 'miscutils']
+
+IMPORT_TIME_BUDGET = 0.2 # seconds, generous to avoid false alarms on slow machines
+
+def run_python(code):
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                          stdout=subprocess.PIPE, universal_newlines=True)
+    return proc.stdout
+
+def test_lazy_modules():
+    imported = run_python('import sys, peepshow; print(*sys.modules)').split()
+    assert not set(LAZY_MODULES) & set(imported)
+
+def test_import_time():
+    code = 'import time; t = time.perf_counter(); import peepshow; print(time.perf_counter() - t)'
+    elapsed = min(float(run_python(code)) for _ in range(3))
+    assert elapsed < IMPORT_TIME_BUDGET
@@ -0,0 +1,314 @@
+import os
+import time
+import threading
+import pytest
+from peepshow.pager import pager
+from peepshow.pager.pager import Pager, Line
+from peepshow.pager.cache import PagedCache, page
+from peepshow.utils import terminal
+
+
+class FakeConsole(terminal.Console):
+    def __init__(self, keys, size=(20, 4)):
+        self.keys = list(keys)
+        self._size = os.terminal_size(size)
+        self.writes = []
+        self.flushes = 0
+
+    def write(self, text):
+        self.writes.append(text)
+
+    def flush(self):
+        self.flushes += 1
+
+    def getch(self):
+        return self.keys.pop(0)
+
+    def size(self):
+        return self._size
+
+
+@pytest.fixture
+def console(use_console, monkeypatch):
+    # prefetching makes number of pulled rows nondeterministic
+    monkeypatch.setattr(pager, 'prefetch_enabled', False)
+    def make(keys, **kwargs):
+        return use_console(FakeConsole(keys, **kwargs))
+    return make
+
+def screens(console):
+    return [w.splitlines() for w in console.writes if w.startswith(('line', '[ ', '\x1b[1m'))]
+
+def wait_for(condition):
+    for _ in range(1000):
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+
+RED = '\x1b[31m'
+RESET = '\x1b[0m'
+
+
+class TestScreen:
+    def test_one_write_per_screen(self, console):
+        con = console([' ', 'q'])
+        Pager().page(f'line {i}' for i in range(100))
+        screens = [w for w in con.writes if 'line' in w]
+        assert len(screens) == 2
+        assert screens[0].startswith('line 0\nline 1\nline 2\n')
+        assert screens[1].startswith('line 3\n')
+        assert con.writes.count(terminal.CLEAR_SCREEN) == 1
+        assert con.flushes == 3 # two screens and the final one
+
+    def test_trim(self, console):
+        con = console([])
+        Pager().page(['x' * 30, 'short'])
+        out = ''.join(con.writes)
+        assert 'x' * 17 + '\x1b[0m\x1b[2m...' in out
+        assert 'x' * 18 not in out
+        assert 'short\n' in out
+
+    def test_rows_are_rendered_lazily(self, console):
+        rendered = []
+        def lines():
+            for i in range(100):
+                rendered.append(i)
+                yield f'line {i}'
+        con = console([' ', 'b', 'b', 'q'])
+        Pager().page(lines())
+        assert len(rendered) == 7 # two screens and one row to check if there is more
+
+    def test_end(self, console):
+        con = console([' ', ' '])
+        Pager().page(f'line {i}' for i in range(5))
+        assert [screen[0] for screen in screens(con)] == ['line 0', 'line 3']
+
+
+class TestLine:
+    def test_line_width(self):
+        assert len(Line('abc')) == 3
+        assert len(Line(f'{RED}abc{RESET}d')) == 4
+        assert len(Line('ab') + Line(f'{RED}c{RESET}')) == 3
+
+    @pytest.mark.parametrize('length, expected', [
+        (0, RESET),
+        (1, f'{RED}a{RESET}'),
+        (3, f'{RED}abc{RESET}'),
+        (4, f'{RED}abc{RESET}d{RESET}'),
+        (9, f'{RED}abc{RESET}de{RESET}'),
+    ])
+    def test_line_trim(self, length, expected):
+        line = Line(f'{RED}abc{RESET}de').trim(length)
+        assert str(line) == expected
+        assert len(line) == min(length, 5)
+
+    def test_line_fits(self):
+        line = Line(f'{RED}abc{RESET}de')
+        assert line.fits(5)
+        assert not line.fits(4)
+        assert not Line('x' * 10).fits(9)
+
+    def test_long_line_is_not_scanned(self):
+        text = 'x' * 100 + RED + 'y' * 10**6
+        line = Line(text)
+        assert not line.fits(80)
+        assert str(line.trim(80)) == 'x' * 80 + RESET
+        assert line._width is None # full width never computed
+
+
+class TestNavigation:
+    def test_few_rows_kept(self, console):
+        con = console([' ', 'b', 'q'])
+        Pager(max_rows=1).page(f'line {i}' for i in range(100))
+        tops = [screen[0] for screen in screens(con)]
+        assert tops == ['line 0', 'line 3', 'line 3']
+
+    def test_back_and_home(self, console):
+        con = console([' ', ' ', 'b', 'g', 'q'])
+        Pager().page(f'line {i}' for i in range(100))
+        tops = [screen[0] for screen in screens(con)]
+        assert tops == ['line 0', 'line 3', 'line 6', 'line 3', 'line 0']
+
+    def test_jump(self, console, monkeypatch):
+        con = console([':', ':', 'q'])
+        answers = iter(['50', '1000'])
+        monkeypatch.setattr(con, 'read', lambda prompt: next(answers), raising=False)
+        Pager().page(f'line {i}' for i in range(100))
+        tops = [screen[0] for screen in screens(con)]
+        assert tops == ['line 0', 'line 50', 'line 97']
+
+
+class TestCache:
+    def test_cache_window(self, console):
+        con = console([' ', ' ', 'q'])
+        cache = PagedCache(range(100), max_pages=2, page_size=3)
+        Pager(numeric=True).page(cache)
+        assert cache[6] == 6
+        with pytest.raises(IndexError, match='no longer cached'):
+            cache[2]
+        with pytest.raises(IndexError, match='listed'):
+            cache[50]
+        con.keys = ['q']
+        cache.recall_cache()
+        # dropped entries cannot be listed again
+        assert screens(con)[-1][0] == '[    6] 6'
+
+    def test_cache_derive(self, console):
+        con = console([' ', ' ', 'q'])
+        derived = []
+        def derive(index):
+            derived.append(index)
+            return -index
+        cache = PagedCache(range(100), derive=derive, max_pages=2, page_size=3)
+        Pager(numeric=True).page(cache)
+        assert cache[2] == -2
+        assert cache[2] == -2
+        assert derived == [2]
+        assert len(cache.pages) == 2
+        con.keys = ['q']
+        cache.recall_cache()
+        assert screens(con)[-1][:3] == ['[    0] 0', '[    1] -1', '[    2] -2']
+        assert list(cache.pages) == [3, 0]
+
+
+class TestSearch:
+    def test_search(self, console, monkeypatch):
+        def lines():
+            for i in range(10**5):
+                yield f'\x1b[1mline\x1b[0m {i}'
+        con = console(['/', 'n', 'N', '/', 'q'])
+        answers = iter(['line 4.7$', 'no such row'])
+        monkeypatch.setattr(con, 'read', lambda prompt: next(answers), raising=False)
+        Pager().page(lines())
+        tops = [Line(screen[0]).no_colors() for screen in screens(con)]
+        # last search goes through all the rows, the screen stays as it was
+        # although only the recent rows are kept
+        assert tops == ['line 0', 'line 407', 'line 417', 'line 407', 'line 407']
+        assert 'Pattern not found' in con.writes[-2]
+
+    def test_search_interrupted(self, console, monkeypatch):
+        def lines():
+            for i in range(100):
+                if i == 50:
+                    raise KeyboardInterrupt # CTRL+C while pulling the row
+                yield f'line {i}'
+        con = console(['/', 'g', ' ', 'q'], size=(120, 4))
+        monkeypatch.setattr(con, 'read', lambda prompt: 'no such row', raising=False)
+        pager = Pager()
+        pager.page(lines())
+        tops = [screen[0] for screen in screens(con)]
+        assert tops == ['line 0', 'line 0', 'line 0', 'line 3']
+        assert pager.truncated
+        hints = [w for w in con.writes if 'Press' in w]
+        assert 'Search interrupted' in hints[1]
+        assert '(END)' not in ''.join(hints)
+
+    def test_search_stops_at_match(self, console, monkeypatch):
+        rendered = []
+        def lines():
+            for i in range(10**5):
+                rendered.append(i)
+                yield f'line {i}'
+        con = console(['/', 'q'])
+        monkeypatch.setattr(con, 'read', lambda prompt: '42', raising=False)
+        Pager().page(lines())
+        assert screens(con)[-1][0] == 'line 42'
+        assert len(rendered) == 46 # one screen from the match and one row more
+
+
+class TestPrefetch:
+    def test_prefetch(self, console, monkeypatch):
+        threads = []
+        def lines():
+            for i in range(100):
+                threads.append(threading.current_thread().name)
+                yield f'line {i}'
+        con = console([])
+        monkeypatch.setattr(pager, 'prefetch_enabled', True)
+        keys = iter([' ', 'q'])
+        def getch():
+            # next screen and one more row are prefetched while waiting for the key
+            assert wait_for(lambda: len(threads) >= 7)
+            return next(keys)
+        monkeypatch.setattr(con, 'getch', getch)
+        Pager().page(lines())
+        assert threads[:4] == ['MainThread'] * 4
+        assert threads[4:7] == ['peepshow-prefetch'] * 3
+        assert screens(con)[1][0] == 'line 3'
+
+    def test_prefetch_error(self, console, monkeypatch):
+        def lines():
+            yield from ['line 0', 'line 1', 'line 2', 'line 3', 'line 4']
+            raise RuntimeError('broken')
+        con = console([' ', ' '])
+        monkeypatch.setattr(pager, 'prefetch_enabled', True)
+        with pytest.raises(RuntimeError):
+            Pager().page(lines())
+
+    def test_prefetch_error_retried(self, console, monkeypatch):
+        main = threading.current_thread()
+        class Bound:
+            # e.g. object bound to a connection of the thread which made it
+            def __repr__(self):
+                if threading.current_thread() is not main:
+                    raise RuntimeError('used in another thread')
+                return 'bound'
+        con = console([])
+        monkeypatch.setattr(pager, 'prefetch_enabled', True)
+        p = Pager(numeric=True)
+        keys = iter([' ', 'q'])
+        def getch():
+            assert wait_for(lambda: p.error is not None)
+            return next(keys)
+        monkeypatch.setattr(con, 'getch', getch)
+        p.page(PagedCache([Bound()] * 10, repr, page_size=3))
+        assert screens(con)[1][:3] == ['[    3] bound', '[    4] bound', '[    5] bound']
+
+    def test_quit_does_not_wait(self, console, monkeypatch):
+        pulling = threading.Event()
+        release = threading.Event()
+        def lines():
+            yield from ['line 0', 'line 1', 'line 2', 'line 3']
+            pulling.set()
+            release.wait() # slow row
+            yield 'line 4'
+        con = console([])
+        monkeypatch.setattr(pager, 'prefetch_enabled', True)
+        def getch():
+            assert pulling.wait(1)
+            return 'q'
+        monkeypatch.setattr(con, 'getch', getch)
+        try:
+            Pager().page(lines())
+        finally:
+            release.set()
+
+    def test_recall_after_quit(self, console, monkeypatch):
+        pulling = threading.Event()
+        release = threading.Event()
+        def entries():
+            yield from range(4)
+            pulling.set()
+            release.wait() # slow row
+            yield from range(4, 100)
+        con = console([])
+        monkeypatch.setattr(pager, 'prefetch_enabled', True)
+        def getch():
+            assert pulling.wait(1)
+            return 'q'
+        monkeypatch.setattr(con, 'getch', getch)
+        try:
+            cache = page(entries())
+        finally:
+            release.set()
+        for thread in threading.enumerate():
+            if thread.name == 'peepshow-prefetch':
+                thread.join(1)
+        # row pulled after quitting is discarded
+        assert cache.index == 4
+        with pytest.raises(IndexError, match='listed'):
+            cache[4]
+        con.keys = ['q']
+        cache.recall_cache()
+        assert screens(con)[-1][0] == '[    0] 0'
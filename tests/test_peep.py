@@ -0,0 +1,114 @@
+import io
+import sys
+import pytest
+import peepshow
+from peepshow import peep, peep_if, peep_batch
+
+
+class Target:
+    def __init__(self):
+        self.items = {'a': [1, 2, 3]}
+
+def test_batch():
+    obj = Target()
+    out = peep_batch(['dir', '.items', 'pp', 'x'], obj)
+    assert '\x1b' not in out
+    assert "[    0] items []* {'a': [1, 2, 3]}" in out
+    assert "pp\n{'a': [1, 2, 3]}\n" in out
+    assert '  target.items  ' in out
+
+def test_batch_locals():
+    secret = 12345
+    out = peep_batch(["['secret']"])
+    assert "REPR         : '12345'" in out
+
+def test_batch_quit_ends_session():
+    out = peep_batch(['q', 'pp'], [1, 2])
+    assert out.rstrip().endswith('> q')
+
+def test_batch_errors():
+    out = peep_batch(['.nonexistent'], 1)
+    assert "Error while executing command '.<ATTRIB>'." in out
+
+def test_batch_file(tmp_path):
+    path = tmp_path / 'commands.txt'
+    path.write_text('# comment\n\npp\n')
+    output = io.StringIO()
+    assert peep_batch(str(path), [1, 2], output=output) is None
+    assert '> pp\n[1, 2]\n' in output.getvalue()
+
+def test_batch_rows_limit():
+    out = peep_batch(['*'], range(100000))
+    assert '[ 9999] ' in out
+    assert '[10000] ' not in out
+
+def test_batch_offset():
+    out = peep_batch(['*99999998', '99999999', '..', '*100000001'], range(10**8))
+    assert '[99999998] 99999998\n[99999999] 99999999\n' in out
+    assert '  target<99999999>  ' in out
+    assert 'Only 100000000 iterations possible.' in out
+
+def test_batch_offset_iterator():
+    out = peep_batch(['*8', '9', '..', '*1'], iter(range(10)))
+    assert '> *8\n[    8] 8\n[    9] 9\n' in out
+    assert '  target<9>  ' in out
+    assert 'Only 0 iterations possible.' in out
+
+def test_batch_items_offset():
+    out = peep_batch(['**2', '2', '..', '**4'], dict.fromkeys('abc', 1))
+    assert "[    2] 'c' : 1\n" in out
+    assert "[    0] 'a'" not in out
+    assert "  target['c']  " in out
+    assert 'Only 3 iterations possible.' in out
+
+def test_batch_items_lazy():
+    class Squares:
+        pulled = 0
+        def keys(self):
+            for key in range(10**6):
+                Squares.pulled += 1
+                yield key
+        def __getitem__(self, key):
+            return key * key
+    out = peep_batch(['**3', '4'], Squares())
+    assert '[    4] 4 : 16\n' in out
+    assert '  target[4]  ' in out
+    assert Squares.pulled < 10**5
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    sessions = []
+    module = sys.modules['peepshow.peep']
+    def fake_peep(frame, args, names_offset):
+        names = peepshow.utils.python.frame_arg_names(frame)
+        sessions.append((names[names_offset], *args))
+    monkeypatch.setattr(module, '_peep', fake_peep)
+    return sessions
+
+def test_when(sessions):
+    for x in range(5):
+        peep(x, when='x % 2')
+        peep(x, when=x > 3)
+    assert sessions == [('x', 1), ('x', 3), ('x', 4)]
+
+def test_hit_counters(sessions):
+    for x in range(10):
+        peep(x, nth=3)
+    for y in range(10):
+        peep(y, when='y % 2', after=3)
+    assert sessions == [('x', 2), ('y', 7), ('y', 9)]
+
+def test_peep_if(sessions):
+    for x in range(4):
+        peep_if('x > 1', x, nth=1)
+        peep_if(x == 0, x)
+    assert sessions == [('x', 0), ('x', 2)]
+
+def test_breakpoint(sessions, monkeypatch):
+    monkeypatch.setattr(sys, 'breakpointhook', sys.breakpointhook)
+    peepshow.install_breakpoint()
+    x = 123
+    breakpoint(x)
+    breakpoint(x, header='ignored')
+    assert sessions == [('x', 123), ('x', 123)]
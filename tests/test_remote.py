@@ -0,0 +1,94 @@
+import os
+import socket
+import threading
+import pytest
+import peepshow
+from peepshow.core import remote
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets required')
+
+def session(path, commands, thread=None):
+    """Drive the session like the client would do, return text written by the server."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    conn = remote.Connection(sock)
+    conn.send({'thread': thread, 'size': (80, 1000)})
+    commands = iter(commands)
+    output = []
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if 'write' in request:
+            output.append(request['write'])
+        elif 'read' in request:
+            cmd = next(commands, None)
+            conn.send({'eof': None} if cmd is None else {'line': cmd})
+        elif 'getch' in request:
+            conn.send({'key': 'q'})
+    conn.close()
+    return ''.join(output)
+
+@pytest.fixture(scope='module')
+def path(tmp_path_factory):
+    return peepshow.listen(str(tmp_path_factory.mktemp('remote') / 'peepshow.sock'))
+
+def test_listen(path):
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert peepshow.listen() == path
+
+def test_globals(path):
+    out = session(path, ["['__name__']", 'pp'])
+    assert "'__main__'" in out
+
+def test_quit_keeps_process(path, monkeypatch):
+    exits = []
+    monkeypatch.setattr('builtins.exit', lambda *args: exits.append(args), raising=False)
+    session(path, ['q'])
+    assert exits == []
+    listeners = [t for t in threading.enumerate() if t.name == 'peepshow-listener']
+    assert listeners and listeners[0].is_alive()
+    assert '12346' in session(path, ['!12345+1'])
+
+@pytest.mark.parametrize('reply', [{}, {'line': 1}, [], {'key': 'q'}])
+def test_malformed_reply(path, reply):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    conn = remote.Connection(sock)
+    conn.send({'thread': None, 'size': (80, 1000)})
+    while 'read' not in conn.recv():
+        pass
+    conn.send(reply)
+    with pytest.raises(EOFError): # server closes the connection
+        while True:
+            conn.recv()
+    conn.close()
+    assert '12346' in session(path, ['!12345+1'])
+
+def test_default_path():
+    directory = remote.default_dir()
+    assert os.path.dirname(remote.default_path(123)) == directory
+    remote._make_private_dir(directory)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+def test_thread(path):
+    ready = threading.Event()
+    done = threading.Event()
+    def worker():
+        local_value = 'xyz123'
+        ready.set()
+        done.wait()
+    thread = threading.Thread(target=worker, name='worker')
+    thread.start()
+    ready.wait()
+    try:
+        frame = "$[f for f in _ if f.callable_name == 'worker'][0]"
+        out = session(path, [frame, "['local_value']", 'pp'], thread='worker')
+    finally:
+        done.set()
+        thread.join()
+    assert "'xyz123'" in out
+
+def test_no_thread(path):
+    assert 'No such thread' in session(path, [], thread='nonexistent')
@@ -0,0 +1,245 @@
+import io
+import json
+import threading
+import pytest
+from peepshow.show import show, show_, enable, disable, configure, using
+from peepshow.show import TextSink, BackgroundSink, JsonSink
+from peepshow.core.sinks import Sink, jsonable
+
+@pytest.fixture(autouse=True)
+def enabled():
+    enable()
+    yield
+    enable()
+
+
+class TestShow:
+    def test_args_kwargs(self, capsys):
+        x = 123
+        y = [1, 2]
+        show(x, y, z=x+1)
+        assert capsys.readouterr().out == 'x = 123\ny = [1, 2]\nz = 124\n'
+
+    def test_exprs(self, capsys):
+        x = 123
+        show_('x+1', y='x*2')
+        assert capsys.readouterr().out == 'x + 1 = 124\ny = 246\n'
+
+
+class TestSwitch:
+    def test_disable_globally(self, capsys):
+        x = 123
+        disable()
+        show(x)
+        show_('x')
+        assert capsys.readouterr().out == ''
+        enable()
+        show(x)
+        assert capsys.readouterr().out == 'x = 123\n'
+
+    def test_disable_module(self, capsys):
+        x = 123
+        disable('tests')
+        show(x)
+        assert capsys.readouterr().out == ''
+        enable('tests.test_show')
+        show(x)
+        assert capsys.readouterr().out == 'x = 123\n'
+
+    def test_enable_module_only(self, capsys):
+        x = 123
+        disable()
+        enable('tests.test_sho') # not a parent module
+        show(x)
+        assert capsys.readouterr().out == ''
+        enable(__name__)
+        show(x)
+        assert capsys.readouterr().out == 'x = 123\n'
+
+
+class TestOnlyChanges:
+    @pytest.fixture(autouse=True)
+    def only_changes(self):
+        configure(only_changes=True)
+        yield
+        configure(only_changes=False)
+
+    def test_repeats_suppressed(self, capsys):
+        x = [1, 2]
+        for i in range(4):
+            if i == 3:
+                x.append(3)
+            show(x)
+        assert capsys.readouterr().out == 'x = [1, 2]\nx = [1, 2, 3]  # previous value repeated 2 time(s)\n'
+
+    def test_values_of_equal_hash(self, capsys):
+        for x in [-1, -2, -1, 5]:
+            show(x)
+        assert capsys.readouterr().out == 'x = -1\nx = -2\nx = -1\nx = 5\n'
+
+    def test_call_sites_independent(self, capsys):
+        x = 123
+        show(x)
+        show(x)
+        assert capsys.readouterr().out == 'x = 123\nx = 123\n'
+
+    def test_identical_functions_in_other_files(self, tmp_path, capsys):
+        # code objects of identical functions compare equal
+        source = 'from peepshow import show\ndef f(x):\n    show(x)\n'
+        funcs = []
+        for name in 'ab':
+            path = tmp_path / f'{name}.py'
+            path.write_text(source)
+            namespace = {}
+            exec(compile(source, str(path), 'exec'), namespace)
+            funcs.append(namespace['f'])
+        for func in funcs:
+            func(123)
+        assert capsys.readouterr().out == 'x = 123\nx = 123\n'
+
+    def test_unknown_option(self):
+        with pytest.raises(TypeError):
+            configure(foo=True)
+
+
+class TestSampling:
+    def test_every(self, capsys):
+        for i in range(7):
+            using(every=3).show(i)
+        assert capsys.readouterr().out == 'i = 0\ni = 3\ni = 6\n'
+
+    def test_first(self, capsys):
+        for i in range(7):
+            using(first=2).show_('i')
+        assert capsys.readouterr().out == 'i = 0\ni = 1\n'
+
+    def test_per_second(self, capsys):
+        for i in range(7):
+            using(per_second=2).show(i)
+        assert capsys.readouterr().out == 'i = 0\ni = 1\n'
+
+    def test_configure(self, capsys):
+        configure(every=2)
+        try:
+            for i in range(4):
+                show(i)
+        finally:
+            configure(every=None)
+        assert capsys.readouterr().out == 'i = 0\ni = 2\n'
+
+    def test_using_cached(self):
+        assert using(every=2) is using(every=2)
+
+    def test_using_list_of_sinks(self):
+        stream = io.StringIO()
+        sink = [TextSink(stream)]
+        x = 1
+        using(sink=sink).show(x)
+        assert stream.getvalue() == 'x = 1\n'
+        assert using(sink=sink) is not using(sink=sink) # sinks are not kept alive
+
+    def test_names_not_resolved(self, capsys):
+        # source of exec'd code is not available, so names cannot be resolved
+        code = compile('show(123)', '<no source>', 'exec')
+        exec(code, {'show': using(first=0).show})
+        assert capsys.readouterr().out == ''
+        with pytest.raises(Exception, match='Cannot determine arg names'):
+            exec(code, {'show': using(first=2).show})
+
+
+class TestBackgroundSink:
+    def test_output(self):
+        stream = io.StringIO()
+        sink = BackgroundSink(TextSink(stream))
+        x = [1, 2]
+        using(sink=sink).show(x)
+        x.append(3) # modification after the call doesn't affect output
+        sink.flush()
+        assert stream.getvalue() == 'x = [1, 2]\n'
+        sink.close()
+
+    def test_many_threads(self):
+        stream = io.StringIO()
+        sink = BackgroundSink(TextSink(stream))
+        def work(i):
+            for j in range(100):
+                using(sink=sink).show(j)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        sink.close()
+        lines = stream.getvalue().splitlines()
+        assert sorted(lines) == sorted(f'j = {j}' for j in range(100) for i in range(4))
+
+
+    def test_max_items(self):
+        stream = io.StringIO()
+        sink = BackgroundSink(TextSink(stream), max_items=3)
+        x = list(range(10**6))
+        using(sink=sink).show(x)
+        sink.close()
+        assert stream.getvalue() == 'x = [0, 1, 2, ...]\n'
+
+    def test_write_error(self, capsys):
+        class FailingSink(TextSink):
+            def write(self, text):
+                if 'x = 1' in text:
+                    raise OSError('disk full')
+                super().write(text)
+
+        stream = io.StringIO()
+        sink = BackgroundSink(FailingSink(stream))
+        for x in range(1, 3):
+            using(sink=sink).show(x)
+            sink.flush() # returns despite the error
+        sink.close()
+        assert stream.getvalue() == 'x = 2\n'
+        assert 'disk full' in capsys.readouterr().err
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            Sink()
+
+
+class TestJsonSink:
+    def test_output(self, capsys):
+        stream = io.StringIO()
+        sink = JsonSink(stream)
+        x = {'a': [1, 2.5, None], 'b': 'qwe'}
+        using(sink=(TextSink(), sink)).show(x, y=x['b'])
+        assert stream.getvalue() == '' # still buffered
+        sink.flush()
+        obj = json.loads(stream.getvalue())
+        assert obj['names'] == ['x', 'y']
+        assert obj['values'] == [x, 'qwe']
+        assert obj['function'] == 'test_output'
+        assert obj['thread'] == threading.current_thread().name
+        assert capsys.readouterr().out.startswith('x = ')
+
+    def test_limits(self):
+        x = {1: ['a' * 10, [[1]]], 2: list(range(10))}
+        y = jsonable(x, max_depth=3, max_items=3, max_string=5)
+        assert y == {'1': ['aaaaa...', ['...']], '2': [0, 1, 2, '...']}
+        assert jsonable(list(range(100)), max_nodes=4) == [0, 1, 2, '...']
+        assert jsonable(float('nan')) == 'nan'
+
+    def test_colliding_keys(self):
+        assert jsonable({1: 'a', '1': 'b'}) == [['1', 'a'], ['1', 'b']]
+        assert jsonable({'ab': 1, 'ac': 2}, max_string=1) == [['a...', 1], ['a...', 2]]
+
+    def test_close(self, tmp_path):
+        path = tmp_path / 'show.jsonl'
+        sink = JsonSink(str(path))
+        using(sink=sink).show(sink)
+        sink.close()
+        assert sink.file.closed
+        assert json.loads(path.read_text())['names'] == ['sink']
+        sink.close()
+
+        stream = io.StringIO()
+        sink = JsonSink(stream)
+        sink.close()
+        assert not stream.closed
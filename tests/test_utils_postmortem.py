@@ -0,0 +1,77 @@
+import sys
+import pickle
+import pytest
+from peepshow.utils import postmortem
+
+
+class Custom:
+    def __init__(self):
+        self.value = 123
+        self.items = [1, 2, 3]
+
+def fail():
+    obj = Custom()
+    big = list(range(1000))
+    raise ValueError('failed')
+
+def fail_twice():
+    try:
+        fail()
+    except ValueError:
+        raise RuntimeError('failed again')
+
+def capture(func, **limits):
+    try:
+        func()
+    except Exception:
+        return postmortem.capture(*sys.exc_info(), **limits)
+
+
+def test_capture():
+    exc_stack = capture(fail)
+    assert len(exc_stack) == 1
+    exc = exc_stack[0]
+    assert exc.type_name == 'ValueError'
+    assert str(exc) == 'failed'
+    frame = exc.frames[-1]
+    assert frame.callable_name == 'fail'
+    assert frame.line == "raise ValueError('failed')"
+    assert frame['obj'].value == 123
+    assert frame['obj'].items == [1, 2, 3]
+    assert isinstance(frame['obj'], postmortem.Stub)
+
+def test_chain():
+    exc_stack = capture(fail_twice)
+    assert [exc.type_name for exc in exc_stack] == ['RuntimeError', 'ValueError']
+
+def test_limits():
+    exc_stack = capture(fail, max_items=10, max_depth=2)
+    frame = exc_stack[0].frames[-1]
+    assert frame['big'] == list(range(10)) + [...]
+    assert frame['obj'].value == 123
+    assert isinstance(frame['obj'].items, postmortem.Stub)
+    assert repr(frame['obj'].items) == '[1, 2, 3]'
+
+def test_limits_innermost_first():
+    def recurse(depth):
+        data = list(range(50))
+        if depth == 0:
+            raise ValueError('deep')
+        recurse(depth - 1)
+    exc_stack = capture(lambda: recurse(100), max_nodes=50)
+    frames = exc_stack[0].frames
+    assert frames[-1]['data'] == list(range(50))
+    assert isinstance(frames[2]['data'], postmortem.Stub)
+
+def test_dump_load(tmp_path):
+    path = postmortem.snapshot_path(tmp_path)
+    postmortem.dump(capture(fail_twice), path)
+    exc_stack = postmortem.load(path)
+    assert str(exc_stack[1]) == 'failed'
+    assert exc_stack[1].frames[-1]['obj'].value == 123
+
+def test_version(tmp_path):
+    path = tmp_path / 'wrong.snapshot'
+    path.write_bytes(pickle.dumps({'version': 0}))
+    with pytest.raises(ValueError):
+        postmortem.load(path)
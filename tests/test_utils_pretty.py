@@ -0,0 +1,87 @@
+import pytest
+from collections import OrderedDict, defaultdict, deque
+from peepshow.utils.pretty import pformat, rows, PrettyPrinter
+
+class TestPformat:
+
+    def test_flat(self):
+        assert pformat([1, (2,), {3}, frozenset(), {'b': 1, 'a': 2}]) == \
+            "[1, (2,), {3}, frozenset(), {'a': 2, 'b': 1}]"
+
+    def test_nested(self):
+        x = {'x': list(range(30)), 'y': 'abc'}
+        assert pformat(x, width=40) == '\n'.join([
+            "{",
+            "    'x': [",
+            *(f"        {i}," for i in range(30)),
+            "    ],",
+            "    'y': 'abc',",
+            "}"])
+
+    def test_subclass(self):
+        x = OrderedDict(a=1)
+        assert pformat(x) == "OrderedDict({'a': 1})"
+
+    def test_ordered_dict(self):
+        x = OrderedDict([('b', 1), ('a', 2)])
+        assert pformat(x) == "OrderedDict({'b': 1, 'a': 2})"
+
+    def test_state_of_collections(self):
+        x = defaultdict(list, a=[1])
+        assert pformat(x) == "defaultdict(<class 'list'>, {'a': [1]})"
+        assert pformat(deque([1], maxlen=2)) == 'deque([1], maxlen=2)'
+
+    def test_deque_and_views(self):
+        x = {'a': 1}
+        assert pformat([deque([1]), x.keys(), x.values(), x.items()]) == \
+            "[deque([1]), dict_keys(['a']), dict_values([1]), dict_items([('a', 1)])]"
+
+    def test_custom_repr(self):
+        class Foo:
+            def __repr__(self):
+                return 'foo\nbar'
+        assert pformat([Foo()], width=5) == '[\n    foo\n    bar,\n]'
+
+    def test_recursion(self):
+        x = [1]
+        x.append(x)
+        assert pformat(x) == f'[1, <Recursion on list with id={id(x)}>]'
+
+
+class TestLimits:
+
+    def test_max_items(self):
+        assert pformat(list(range(10**6)), max_items=3) == '[0, 1, 2, ...]'
+        assert pformat(list(range(10**6)), max_items=3, width=10) == '[\n    0,\n    1,\n    2,\n    ...\n]'
+
+    def test_max_items_deque_and_views(self):
+        assert pformat(deque(range(10**6)), max_items=3) == 'deque([0, 1, 2, ...])'
+        assert pformat(dict.fromkeys(range(10**6)).keys(), max_items=2) == 'dict_keys([0, 1, ...])'
+
+    def test_max_depth(self):
+        assert pformat([[[[1]]], []], max_depth=2) == '[[[...]], []]'
+
+    def test_max_string(self):
+        assert pformat('x' * 10**6, max_string=3) == "'xxx'..."
+
+    def test_max_bytes(self):
+        lines = pformat([list(range(100))] * 100, max_bytes=100).splitlines()
+        assert lines[-1] == '...'
+        assert sum(map(len, lines)) < 100
+
+    def test_lazy(self):
+        x = list(range(100))
+        lines = PrettyPrinter(width=10).lines(x)
+        assert next(lines) == '['
+        assert next(lines) == '    0,'
+
+
+class TestRows:
+
+    def test_split(self):
+        x = ['x' * 20]
+        assert [*rows(x, width=10)] == ['[', "    'xxxxx", 'xxxxxxxxxx', "xxxxx',", ']']
+
+    def test_unlimited(self):
+        x = [list(range(200))] * 200
+        assert sum(1 for row in rows(x)) == 200 * 202 + 2
@@ -3,7 +3,8 @@ from peepshow.utils.python import caller_gloloc
 from peepshow.utils.python import arg_names
 from peepshow.utils.python import CheckInvocation, InvocationError
 from peepshow.utils.python import catch, NoException
-from peepshow.utils.python import nth, prettify_expr, exc_to_str
+from peepshow.utils.python import nth, prettify_expr, exc_to_str, fingerprint, snapshot
+from peepshow.utils.python import compile_expr
 
 class TestCallerGloloc:
     def test_locals(self):
@@ -50,6 +51,36 @@ class TestArgNames:
 
         bar()
 
+    def test_same_call_site(self):
+        results = []
+        def foo(a, b):
+            anames = arg_names()
+            results.append(anames)
+            anames.append('z')
+
+        x, y = 1, 2
+        for _ in range(3):
+            foo(x, y)
+
+        assert results == [['x', 'y', 'z']] * 3
+
+    def test_source_not_available(self):
+        def foo(a):
+            return arg_names()
+
+        with pytest.raises(Exception, match='Cannot determine arg names'):
+            exec('foo(123)', {'foo': foo})
+
+    def test_source_not_available_repeatedly(self):
+        # failure is cached per call site as well
+        def foo(a):
+            return arg_names()
+
+        code = compile('foo(123)', '<no source>', 'exec')
+        for _ in range(2):
+            with pytest.raises(Exception, match='Cannot determine arg names'):
+                exec(code, {'foo': foo})
+
 
 class TestCheckInvocation:
 
@@ -168,3 +199,85 @@ class TestExcToStr:
 
         assert exc_to_str(exc) == 'RuntimeError'
         assert exc_to_str(exc, True) == 'RuntimeError'
+
+
+class TestFingerprint:
+
+    def test_equal_values(self):
+        assert fingerprint([1, {'a': (2, 3)}]) == fingerprint([1, {'a': (2, 3)}])
+        assert fingerprint(1) != fingerprint(True)
+
+    def test_mutated_container(self):
+        x = [1, 2, 3]
+        fp = fingerprint(x)
+        x[1] = 5
+        assert fingerprint(x) != fp
+
+    def test_budget_exceeded(self):
+        x = list(range(100))
+        fp = fingerprint(x, budget=10)
+        x[1] = 5
+        assert fingerprint(x, budget=10) == fp # only id and len are considered
+        x.append(1)
+        assert fingerprint(x, budget=10) != fp
+
+    def test_self_reference(self):
+        x = []
+        x.append(x)
+        fingerprint(x)
+
+    def test_equal_hashes(self):
+        assert hash(-1) == hash(-2)
+        assert fingerprint(-1) != fingerprint(-2)
+        assert fingerprint([0]) != fingerprint([2**61 - 1])
+
+    def test_mutated_unhashable(self):
+        x = bytearray(b'abc')
+        fp = fingerprint(x)
+        x[0] = ord('x')
+        assert fingerprint(x) != fp
+        assert fingerprint(bytearray(b'abc')) == fingerprint(bytearray(b'abc'))
+
+
+class TestSnapshot:
+
+    def test_shallow(self):
+        x = [1, [2]]
+        y = snapshot(x)
+        x.append(3)
+        x[1].append(4)
+        assert y == [1, [2, 4]]
+
+    def test_deep(self):
+        x = {'a': [1, {2}]}
+        y = snapshot(x, depth=3)
+        x['a'][1].add(3)
+        assert y == {'a': [1, {2}]}
+
+    def test_no_copy(self):
+        x = [1]
+        assert snapshot(x, depth=0) is x
+
+    def test_max_items(self):
+        assert snapshot(list(range(10**6)), max_items=2) == [0, 1, ...]
+        assert snapshot({1: 1, 2: 2}, max_items=1) == {1: 1, ...: ...}
+        assert snapshot([[1, 2, 3]], depth=2, max_items=2) == [[1, 2, ...]]
+        x = bytearray(10)
+        assert snapshot(x, max_items=5) is x
+
+
+class TestCompileExpr:
+
+    def test_eval(self):
+        code = compile_expr(' x + 1')
+        assert eval(code, {'x': 1}) == 2
+        assert compile_expr(' x + 1') is code
+
+    def test_exec(self):
+        loc = {}
+        exec(compile_expr('x = 1', 'exec'), {}, loc)
+        assert loc == {'x': 1}
+
+    def test_syntax_error(self):
+        with pytest.raises(SyntaxError):
+            compile_expr('x = 1')
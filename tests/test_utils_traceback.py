@@ -0,0 +1,41 @@
+from peepshow.utils.traceback import ExceptionSummary, FrameSummary
+
+def raise_error(depth):
+    x = depth
+    if depth:
+        raise_error(depth - 1)
+    else:
+        raise RuntimeError('qwe')
+
+def get_summary(depth):
+    try:
+        raise_error(depth)
+    except RuntimeError as ex:
+        return ExceptionSummary(type(ex), ex, ex.__traceback__)
+
+
+class TestExceptionSummary:
+
+    def test_frames(self):
+        summary = get_summary(3)
+        frames = summary.frames
+        assert [f.callable_name for f in frames] == ['get_summary'] + ['raise_error'] * 4
+        assert [f['x'] for f in frames[1:]] == [3, 2, 1, 0]
+        assert frames[-1].line == "raise RuntimeError('qwe')"
+        assert str(summary) == 'qwe'
+
+    def test_lazy(self):
+        summary = get_summary(3)
+        first = next(iter(summary))
+        assert summary._summaries[1:] == [None] * 4
+        assert next(iter(summary)) is first
+
+
+class TestFrameSummary:
+
+    def test_source_not_available(self):
+        namespace = {}
+        exec(compile('import sys\nframe = sys._getframe()', '<no source>', 'exec'), namespace)
+        summary = FrameSummary(namespace['frame'])
+        assert summary.line == '<N/A>'
+        assert summary['frame'] is namespace['frame']